@@ -1,16 +1,45 @@
-import requests
+import argparse
+import io
 import json
 import sys
-from packaging.version import parse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from github_client import get_client
+from graphql_batch import compare_commits, resolve_repos
+from release_events import EventStream
+from release_journal import ReleaseJournal
+from tag_index import TagIndexCache, build_index
+
+parser = argparse.ArgumentParser(description="Create release tags for repositories that changed since their latest tag")
+parser.add_argument("base", help="Base branch for the release (e.g. develop or main)")
+parser.add_argument("tag", help="Release tag name (e.g. v1.0.0)")
+parser.add_argument("repos", help="Comma-separated owner/repo list")
+parser.add_argument("token", nargs="?", default="", help="GitHub token from Jenkins credentials")
+parser.add_argument("--concurrency", type=int, default=1,
+                    help="Number of repositories processed in parallel (default: 1)")
+parser.add_argument("--events", choices=["ndjson"],
+                    help="Emit one JSON object per release state change (logs then go to stderr)")
+parser.add_argument("--events-file",
+                    help="Write the --events stream to this file instead of stdout")
+parser.add_argument("--journal", help="Release journal file (default: ~/.cache/jenkins-cicd/release-journal.json)")
+resume_group = parser.add_mutually_exclusive_group()
+resume_group.add_argument("--resume", dest="fresh", action="store_false", default=False,
+                          help="Skip phases a previous run of this release already finished (default)")
+resume_group.add_argument("--fresh", dest="fresh", action="store_true",
+                          help="Discard the journal of this release and start over")
+parser.add_argument("--batch", action="store_true",
+                    help="Resolve every repo's tags and base branch head in one GraphQL request")
+args = parser.parse_args()
 
 # 1. for Base branch (e.g., "develop" or "main")
-base = sys.argv[1] 
+base = args.base
 
 # 2. Release Tag Name
-tag = sys.argv[2]
+tag = args.tag
 
 # 3. for Repositories (comma-separated string)
-repos = sys.argv[3]  
+repos = args.repos
 user_repo = [repo.strip() for repo in repos.split(",") if repo.strip()]
 
 repositories = []
@@ -22,63 +51,152 @@ for entry in user_repo:
     print(f"Invalid format in the .env file '{entry} , SKipping.....")
 
 # 4. GitHub token from Jenkins credentials 
-token = sys.argv[4]
+token = args.token
 
 if not token:
   print("Error: Github token is missing. Please set it in the environment variable")
   exit(1)
 
+# Shared pooled client used for every GitHub call below
+github = get_client(token)
+tag_indexes = TagIndexCache()
+
+# Tags and base heads pre-resolved by --batch, keyed by "owner/repo"
+resolved_repos = {}
+
+# Machine-readable state changes for --events, a no-op stream otherwise
+events = EventStream()
+
+# Finished phases per repo for this release, created in main()
+journal = None
+
 test_url = "https://api.github.com/gripinvest"
 headers = {"Authorization": f"token {token}"}
-response = requests.get(test_url, headers=headers)
+response = github.get(test_url, headers=headers, name="token_check")
 if response.status_code == 401:
     print(" Error: Invalid GitHub token. Check your token permissions and try again.")
     exit(1)
 
+# A tag listing or compare that failed even after the client's retries. It must not be
+# mistaken for "no changes", or the journal would skip the repo on every rerun
+class ReleaseLookupError(Exception):
+  pass
+
 # fetching the latest release of current version
 def fetch_latest_release(owner, repo, token):
-    # Fetch the latest release
-    release_url = f"https://api.github.com/repos/{owner}/{repo}/releases"
-    headers = {
-        "Accept": "application/vnd.github.v3+json"
-    }
-    if token:
-        headers['Authorization'] = f"token {token}"
-
-    response = requests.get(release_url, headers=headers)
-
-    tags = []
-    if response.status_code == 200 and response.json():
-        releases = response.json()
-        tags = [release["tag_name"] for release in releases if "tag_name" in release]
-
-    # Fetch tags if no releases exist
-    if not tags:
-        tag_url = f"https://api.github.com/repos/{owner}/{repo}/tags"
-        response = requests.get(tag_url, headers=headers)
-        if response.status_code == 200 and response.json():
-            tags = [tag["name"] for tag in response.json()]
-
-    # Sort tags properly (assuming semantic versioning)
-    tags.sort(key=parse, reverse=True)
+    resolved = resolved_repos.get(f"{owner}/{repo}")
+    if resolved and resolved["refs"]:
+      # Already fetched by the GraphQL batch lookup
+      index = build_index(resolved["refs"])
+    else:
+      # Sorted semver index built from every tag ref, not just the first page of releases
+      index = tag_indexes.get(github, owner, repo)
+      if index is None:
+        raise ReleaseLookupError(f"could not list the tags of {owner}/{repo}")
 
-    # print(f"Sorted Tags: {tags}")
+    # print(f"Sorted Tags: {index.names()}")
 
     # Assign latest and previous tags correctly
-    latest_tag = tags[0] if tags else base
+    latest_tag = index.latest() or base
 
     # If only one tag, compare with base
-    prev_tag = tags[1] if len(tags) > 1 else base 
+    prev_tag = index.previous() or base
 
     # print(f"Latest Tag: {latest_tag}, Previous Tag: {prev_tag}")
     return latest_tag, prev_tag
 
-# Compare the branch to get 
+# Resolve a branch or tag name to its commit SHA; the sha media type returns only the 40-byte SHA
+def resolve_commit_sha(owner, repo, ref):
+  url = f"https://api.github.com/repos/{owner}/{repo}/commits/{ref}"
+  response = github.get(url, headers={"Accept": "application/vnd.github.sha"}, name="resolve_commit_sha")
+  if response.status_code != 200:
+    return None
+  return response.text.strip()
+
+# Commit SHA of a tag, taken from the batch lookup or tag index when already known
+def tag_commit_sha(owner, repo, tag_name):
+  key = f"{owner}/{repo}"
+  for ref in resolved_repos.get(key, {}).get("refs", []):
+    if ref["ref"] == f"refs/tags/{tag_name}":
+      return ref["object"]["sha"]
+
+  index = tag_indexes.indexes.get(key)
+  if index is not None:
+    sha, object_type = index.sha(tag_name)
+    if sha and object_type == "commit":
+      return sha
+
+  return resolve_commit_sha(owner, repo, tag_name)
+
+# Head SHA of the base branch, remembered so create_tag can reuse it
+def base_head_sha(owner, repo, base):
+  resolved = resolved_repos.setdefault(f"{owner}/{repo}", {"refs": [], "head": None})
+  if not resolved["head"]:
+    resolved["head"] = resolve_commit_sha(owner, repo, base)
+  return resolved["head"]
+
+# Tree SHA of a commit, from the batch lookup or the small git commit object. Commits
+# never change, so the HTTP cache answers the tag's commit with a 304 on later runs
+def commit_tree_sha(owner, repo, sha):
+  if not sha:
+    return None
+  trees = resolved_repos.get(f"{owner}/{repo}", {}).get("trees") or {}
+  if sha in trees:
+    return trees[sha]
+  url = f"https://api.github.com/repos/{owner}/{repo}/git/commits/{sha}"
+  response = github.get(url, name="commit_tree")
+  if response.status_code != 200:
+    return None
+  return response.json()["tree"]["sha"]
+
+# Compare the branch to get. Returns (changed, changelog, commits ahead of the tag)
 def compare_branch(owner, repo, base, branch, token):
   # api call for check in github
   if not branch:
     print(f" Skipping {repo} - No valid feature branch found.")
     branch = base
+
+  compare_link = f"https://github.com/{owner}/{repo}/compare/{branch}...{base}"
+
+  # Fast path 1: the tag already points at the head of base, nothing to release
+  if branch == base:
+    print(f"Github Compare Link: {compare_link}")
+    print("Total Commits Ahead: 0")
+    return False, [], 0
+
+  tag_sha = tag_commit_sha(owner, repo, branch)
+  head_sha = base_head_sha(owner, repo, base)
+  if tag_sha and head_sha and tag_sha == head_sha:
+    print(f"Github Compare Link: {compare_link}")
+    print("Total Commits Ahead: 0")
+    return False, [], 0
+
+  # Fast path 2: a release needs a non-empty diff, not just new commits. The diff is
+  # empty exactly when both commits have the same tree, e.g. after a revert pair or an
+  # empty merge, so the changed files never have to be downloaded
+  tag_tree = commit_tree_sha(owner, repo, tag_sha)
+  head_tree = commit_tree_sha(owner, repo, head_sha)
+  if tag_tree is None or head_tree is None:
+    return compare_branch_full(owner, repo, base, branch, token)
+
+  print(f"Github Compare Link: {compare_link}")
+  if tag_tree == head_tree:
+    print(f"Total Changes: 0 (same tree as {branch})")
+    return False, [], 0
+
+  # The release is certain now; only its changelog is still needed
+  result = compare_commits(github, owner, repo, f"refs/tags/{branch}", base)
+  if result is None:
+    _, changelog, ahead_by = compare_branch_full(owner, repo, base, branch, token)
+    return True, changelog, ahead_by
+  ahead_by, commits = result
+  print(f"Total Commits Ahead: {ahead_by}")
+  changelog = [f"- {commit['message']} (by {(commit.get('author') or {}).get('name')})" for commit in commits]
+  return True, changelog, ahead_by
+
+# Full REST compare, which also downloads the changed files and patches. Only used when
+# the tree SHAs or the GraphQL compare are unavailable
+def compare_branch_full(owner, repo, base, branch, token):
   # For Checking in reverse Direction 
   url = f"https://api.github.com/repos/{owner}/{repo}/compare/{branch}...{base}"
 
@@ -91,7 +209,7 @@ def compare_branch(owner, repo, base, branch, token):
     headers['Authorization'] = f"token {token}"
 
   # fetching the data 
-  response = requests.get(url, headers=headers)
+  response = github.get(url, headers=headers, name="compare_branch")
   data = response.json()
 
   if response.status_code == 200:
@@ -127,14 +245,14 @@ def compare_branch(owner, repo, base, branch, token):
 
     print(f"Total Changes: {total_changes}")
 
-    return total_changes > 0, changelog, total_changes
+    return total_changes > 0, changelog, data.get('total_commits', len(changelog))
 
   else:
-    print(f"Error {response.status_code}: {response.json().get('message', 'Unknown error')}")
-    return False, [], 0
+    raise ReleaseLookupError(f"compare {branch}...{base} failed with {response.status_code}: {data.get('message', 'Unknown error')}")
 
-# handle github releases 
-def create_github_release(owner, repo, tag_name, title, description, token, latest_tag):
+# handle github releases. With target_commitish the Releases API also creates the
+# tag, so a new tag and its release cost a single POST
+def create_github_release(owner, repo, tag_name, title, description, token, latest_tag, target_commitish=None):
   release_url = f"https://api.github.com/repos/{owner}/{repo}/releases"
 
   headers = {
@@ -143,66 +261,157 @@ def create_github_release(owner, repo, tag_name, title, description, token, late
   if token: 
     headers['Authorization'] = f"token {token}"
 
-    release_data = {
-        "tag_name": tag_name,
-        "name": title,
-        "body": f" What's Changed\n {description}\n\n Full Changelog\n[View Compare](https://github.com/{owner}/{repo}/compare/{latest_tag}...{tag_name})",
-        "draft": False,  
-        "prerelease": False 
-    }
-
-    response = requests.post(release_url, json=release_data, headers=headers)
-
-    if response.status_code == 201:
-      print(f"Successfully created release '{title}' for {repo}!")
-      print(f"Release URL : {response.json().get('html_url')}")
-    else:
-      print(f"Error Creating  release for repo {repo}: {response.json().get('message','Unknown')}")
-
-# create a tag or release for the change that found
-def create_tag(owner, repo, new_tag, base, token, changelog, prev_tag):
-  tag_url = f"https://api.github.com/repos/{owner}/{repo}/git/refs"
-
-  headers = {
-    "Accept": "application/vnd.github.v3+json"
+  release_data = {
+      "tag_name": tag_name,
+      "name": title,
+      "body": f" What's Changed\n {description}\n\n Full Changelog\n[View Compare](https://github.com/{owner}/{repo}/compare/{latest_tag}...{tag_name})",
+      "draft": False,  
+      "prerelease": False 
   }
+  if target_commitish:
+    release_data["target_commitish"] = target_commitish
+
+  response = github.post(release_url, json=release_data, headers=headers, name="create_github_release")
+
+  if response.status_code == 201:
+    print(f"Successfully created tag '{tag_name}' for {repo}.")
+    events.emit("tag_created", f"{owner}/{repo}", tag=tag_name, sha=target_commitish)
+    print(f"Successfully created release '{title}' for {repo}!")
+    print(f"Release URL : {response.json().get('html_url')}")
+    events.emit("release_created", f"{owner}/{repo}", tag=tag_name, url=response.json().get('html_url'))
+    return True
+
+  # 422: a release for this tag already exists, e.g. from a half-finished earlier run. Adopt it.
+  if response.status_code == 422:
+    existing = github.get(f"{release_url}/tags/{tag_name}", headers=headers, name="create_github_release")
+    if existing.status_code == 200:
+      print(f"Release '{tag_name}' already exists for {repo}, reusing it.")
+      print(f"Release URL : {existing.json().get('html_url')}")
+      events.emit("release_created", f"{owner}/{repo}", tag=tag_name, url=existing.json().get('html_url'), adopted=True)
+      return True
+
+  print(f"Error Creating  release for repo {repo}: {response.json().get('message','Unknown')}")
+  events.emit("error", f"{owner}/{repo}", phase="release", message=response.json().get('message','Unknown'))
+  return False
+
+# create a tag or release for the change that found. An existing tag (with or
+# without a release) is adopted, so rerunning a half-finished release is safe
+def create_tag(owner, repo, new_tag, base, token, changelog, prev_tag, latest_commit_sha=None):
+  # Pin the tag to the head SHA resolved during the comparison. If it is unknown,
+  # let GitHub resolve the branch head itself instead of spending a GET on it
+  target = latest_commit_sha or resolved_repos.get(f"{owner}/{repo}", {}).get("head") or base
+
+  # Automatically set the release title as per new tag name
+  release_title = new_tag
+  release_description = "\n".join(changelog)
+  return create_github_release(owner, repo, new_tag, release_title, release_description, token, prev_tag, target)
+      
+# Route print() output of worker threads into a per-repo buffer so that
+# parallel runs still log each repository as one contiguous block
+class RepoOutput(io.TextIOBase):
+  def __init__(self, stream):
+    self.stream = stream
+    self.local = threading.local()
+
+  def write(self, text):
+    buffer = getattr(self.local, "buffer", None)
+    if buffer is not None:
+      return buffer.write(text)
+    return self.stream.write(text)
+
+  def flush(self):
+    self.stream.flush()
+
+# Run the full check/compare/tag pipeline for one repository, skipping the
+# phases the journal says a previous run of this release already finished
+def process_repo(owner, repo):
+    key = f"{owner}/{repo}"
+    print(f"\n Checking repository: {key}")
+    events.start(key)
+    done = journal.get(key)
+
+    if "released" in done:
+        print(f"Release '{tag}' was already created for {repo} by a previous run")
+        events.emit("skipped", key, reason="already released")
+        return True
+
+    # A check is only reused while the base branch still points at the commit it looked at;
+    # a fix merged since the failed run is compared again instead of being skipped for good
+    if "checked" in done:
+        checked_head = done["checked"].get("head")
+        head_sha = base_head_sha(owner, repo, base)
+        if not checked_head or checked_head != head_sha:
+            print(f"{base} moved since the journal checked {repo} ({(checked_head or 'unknown')[:12]} -> {(head_sha or 'unknown')[:12]}), checking again")
+            del done["checked"]
+
+    if "checked" in done:
+        checked = done["checked"]
+        feature_branch = checked["latest_tag"]
+        changes_found, changelog, commits_ahead = checked["changed"], checked["changelog"], checked.get("commits")
+        print(f"Prev_Tag: {feature_branch} (from journal)")
+    else:
+        feature_branch, prev_tag = fetch_latest_release(owner, repo, token)
 
-  if token:
-    headers['Authorization'] = f"token {token}"
-
-  branch_url = f"https://api.github.com/repos/{owner}/{repo}/git/ref/heads/{base}"
-  branch_response = requests.get(branch_url, headers=headers)
-
-  if branch_response.status_code != 200:
-    print(f"Error fetching the lates commit for {repo}: {branch_response.json().get('message', 'unknown Error')}")
-    return 
-  
-  latest_commit_sha = branch_response.json().get("object", {}).get("sha")
+        # A rerun finds its own release tag as the latest one; compare from the tag before it
+        if feature_branch == tag:
+            print(f"Tag '{tag}' already exists for {repo}, comparing against {prev_tag}")
+            feature_branch = prev_tag
+        print(f"Prev_Tag: {feature_branch}")
 
-  if not latest_commit_sha:
-    print(f"Unable to find the latest commit SHA for the {repo}")
-    return
-  
-  tag_data = {
-    "ref" : f"refs/tags/{new_tag}",
-    "sha": latest_commit_sha
-  }
-  
-  tag_response = requests.post(tag_url, json=tag_data, headers=headers)
-  
-  if tag_response.status_code == 201:
-    print(f"Successfully created tag '{new_tag}' for {repo}.")
-    
-    # Automatically set the release title as per new tag name
-    release_title = new_tag
-    release_description = "\n".join(changelog)
-    create_github_release(owner, repo, new_tag, release_title,release_description, token, prev_tag)
+        # A failed lookup raises before this point, so only a finished check is recorded
+        changes_found, changelog, commits_ahead = compare_branch(owner, repo, base, feature_branch, token)
+        # print(f"changes found : {changes_found}")
+        journal.record(key, "checked", {
+            "latest_tag": feature_branch, "changed": changes_found, "changelog": changelog,
+            "commits": commits_ahead, "head": resolved_repos.get(key, {}).get("head"),
+        })
+    events.emit("repo_checked", key, latest_tag=feature_branch, commits=commits_ahead, changed=changes_found)
+
+    # changes found to create the tag 
+    if changes_found:
+        new_tag = tag
+        print(f"Latest_Tag: {new_tag}")
+        if new_tag:
+            head_sha = resolved_repos.get(key, {}).get("head")
+            if create_tag(owner, repo, new_tag, base, token,changelog, feature_branch, head_sha):
+                journal.record(key, "released", {"head": head_sha})
+            return True
+    else:
+        print(f"No Changes found for {repo} so No Tag created")
+        events.emit("skipped", key, reason="no changes", latest_tag=feature_branch)
+    return False
+
+# Run process_repo, turning an exception into an error event so the other repos
+# still run. Returns (changed, failed); the caller fails the run if any repo failed
+def process_repo_safe(owner, repo):
+    try:
+      return process_repo(owner, repo), False
+    except Exception as e:
+      print(f"Error processing {owner}/{repo}: {e!r}")
+      events.emit("error", f"{owner}/{repo}", phase="pipeline", message=str(e))
+      return False, True
+
+# Run process_repo_safe with its output captured, so it can be replayed in input order.
+# Returns (changed, log, failed)
+def process_repo_buffered(output, owner, repo):
+    output.local.buffer = io.StringIO()
+    try:
+      changed, failed = process_repo_safe(owner, repo)
+    finally:
+      log = output.local.buffer.getvalue()
+      output.local.buffer = None
+    return changed, log, failed
 
-  else:
-    print(f"Error creating tag '{new_tag}' for {repo}: {tag_response.json().get('message', 'unknown error')}")
-      
 # Main function to call 
 def main():
+    global events, journal
+    # With --events, stdout carries only JSON lines: the event stream and the final repo list
+    result_stream = sys.stdout
+    if args.events:
+      events = EventStream(open(args.events_file, "w", encoding="utf-8") if args.events_file else sys.stdout)
+      if not args.events_file:
+        sys.stdout = sys.stderr
+
     if 'repos_list' not in locals():
       repos_list = []
       
@@ -222,37 +431,71 @@ def main():
         print(f"Invalid format in the .env file '{entry} , SKipping.....")
   
 
-    # List to store the repository with changes
-    changed_repos = []
-
-    for owner, repo in repositories:
-        print(f"\n Checking repository: {owner}/{repo}")
-        feature_branch, prev_tag = fetch_latest_release(owner, repo, token)
-        print(f"Prev_Tag: {feature_branch}")
-
-        changes_found, changelog, total_changes = compare_branch(owner, repo, base, feature_branch, token)
-        # print(f"changes found : {changes_found}")
-
-        # changes found to create the tag 
-        if changes_found:
-            new_tag = tag
-            print(f"Latest_Tag: {new_tag}")
-            if new_tag:
-                create_tag(owner, repo, new_tag, base, token,changelog, feature_branch)
-
-                 # Add repository to the list
-                changed_repos.append(f"{owner}/{repo}") 
-        else:
-            print(f"No Changes found for {repo} so No Tag created")
+    journal = ReleaseJournal(tag, base, args.journal, fresh=args.fresh)
+
+    # A follower of the event stream only stops at `finished`, so it is emitted even
+    # when the run dies halfway
+    finished = False
+    try:
+      # One GraphQL round trip for every repo's tags and base branch head, skipping repos the
+      # journal already released. Checked repos are included: their head shows whether the check still holds
+      pending = [(owner, repo) for owner, repo in repositories if "released" not in journal.get(f"{owner}/{repo}")]
+      if args.batch and pending:
+        resolved_repos.update(resolve_repos(github, pending, base))
+        print(f"Resolved {len(resolved_repos)}/{len(pending)} repositories in one GraphQL request")
+
+      failed = []
+      if args.concurrency > 1 and len(repositories) > 1:
+          output = RepoOutput(sys.stdout)
+          sys.stdout = output
+          try:
+            with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+              futures = [executor.submit(process_repo_buffered, output, owner, repo) for owner, repo in repositories]
+              # Replay the logs in input order as each repository finishes
+              for (owner, repo), future in zip(repositories, futures):
+                changed, log, repo_failed = future.result()
+                output.stream.write(log)
+                output.stream.flush()
+                if repo_failed:
+                  failed.append(f"{owner}/{repo}")
+          finally:
+            sys.stdout = output.stream
+      else:
+          for owner, repo in repositories:
+              changed, repo_failed = process_repo_safe(owner, repo)
+              if repo_failed:
+                failed.append(f"{owner}/{repo}")
+
+      # List of the repositories whose release exists, in input order, including those
+      # released by an earlier run of the same release. A repo whose release could not be
+      # created is left out, so the workflow watcher does not wait for a run that never starts
+      changed_repos = journal.released_repos([f"{owner}/{repo}" for owner, repo in repositories])
+
+      github.print_stats()
+
+      # Fail instead of handing Jenkins a partial release
+      if failed:
+        print(f"Error: {len(failed)} repositories failed: {', '.join(failed)}")
+        events.emit("error", phase="run", failed_repos=failed, message="repositories failed")
+        events.emit("finished", changed_repos=changed_repos, failed_repos=failed)
+        finished = True
+        sys.exit(1)
+
+      events.emit("finished", changed_repos=changed_repos)
+      finished = True
+    finally:
+      if not finished:
+        events.emit("finished", changed_repos=journal.released_repos([f"{owner}/{repo}" for owner, repo in repositories]),
+                    aborted=True)
+      events.close()
 
-        
     # Print the list of repositories with changes at the end
     if changed_repos:
       repos_json = json.dumps(changed_repos)
-      print(repos_json)
+      print(repos_json, file=result_stream)
       sys.exit(0)
     else :
-      print("[]")
+      print("[]", file=result_stream)
       sys.exit(0)
 
 if __name__ == "__main__":
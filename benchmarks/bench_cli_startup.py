@@ -0,0 +1,64 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be loaded just by importing deployment or asking for --help
+HEAVY_MODULES = ("requests", "github_client", "manifest_scan", "manifest_index", "manifest_commit", "yaml",
+                 "concurrent.futures")
+
+COMMANDS = {
+    "python": ["-c", "pass"],
+    "import_deployment": ["-c", "import deployment"],
+    "help_all": [os.path.join(ROOT, "production_deployment_all.py"), "--help"],
+    "help_sirius": [os.path.join(ROOT, "production_deployment.py"), "--help"],
+    "help_cd": [os.path.join(ROOT, "CD.py"), "--help"],
+}
+
+
+# Median wall time of a fresh interpreter running args, in milliseconds
+def time_command(args, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 1), round(min(samples), 1)
+
+
+def loaded_heavy_modules():
+    script = f"import sys, deployment; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True, capture_output=True, text=True)
+    return output.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time of the deployment CLI and of importing deployment")
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=60,
+                        help="Allowed median time of 'import deployment' above a bare interpreter start")
+    args = parser.parse_args()
+
+    timings = {}
+    for name, command in COMMANDS.items():
+        median, best = time_command(command, args.runs)
+        timings[name] = {"median_ms": median, "min_ms": best}
+
+    overhead = round(timings["import_deployment"]["median_ms"] - timings["python"]["median_ms"], 1)
+    heavy = loaded_heavy_modules()
+    summary = {
+        "benchmark": "cli_startup", "runs": args.runs, "timings": timings,
+        "import_overhead_ms": overhead, "budget_ms": args.budget_ms, "heavy_modules_loaded": heavy,
+        "within_budget": overhead <= args.budget_ms and not heavy,
+    }
+    print(json.dumps(summary))
+    return 0 if summary["within_budget"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_deploy_suite import OWNER, REPO, TOKEN, redirect_github
+from manifest_commit import commit_tag_changes
+from manifest_rewrite import TagRewriter
+
+# commit-tree needs an identity; Jenkins sets a global one, a scratch run may not have any
+for variable, value in (("GIT_AUTHOR_NAME", "bench"), ("GIT_AUTHOR_EMAIL", "bench@localhost"),
+                        ("GIT_COMMITTER_NAME", "bench"), ("GIT_COMMITTER_EMAIL", "bench@localhost")):
+    os.environ.setdefault(variable, value)
+
+
+def git(*args, cwd=None):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+# One deployer running Deployment.deploy through a sparse checkout, in its own process as
+# on a separate Jenkins agent: deploy() changes into the clone, so it cannot share a process.
+# Waits for the common start time, then exits 0 when its edit was pushed
+CHECKOUT_DEPLOYER = r"""
+import sys, time
+sys.path.insert(0, sys.argv[1])
+from deployment import Deployment
+start_at, i, max_attempts = float(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4])
+time.sleep(max(0.0, start_at - time.time()))
+deployment = Deployment(sys.argv[5], sys.argv[6], "main", owner=sys.argv[7], max_attempts=max_attempts)
+sys.exit(0 if deployment.deploy(f"v2.0.{i}", f"svc-{i}", commit_message=f"Updated svc-{i} to v2.0.{i}") else 1)
+"""
+
+# Bare repo standing in for argocd-prod: one values file per service on branch main
+def create_remote(root, services):
+    remote = os.path.join(root, f"{REPO}.git")
+    seed = os.path.join(root, "seed")
+    git("init", "--quiet", "--bare", remote)
+    git("-C", remote, "config", "uploadpack.allowFilter", "true")
+    git("init", "--quiet", "-b", "main", seed)
+    for i in range(services):
+        directory = os.path.join(seed, "services", f"svc-{i}")
+        os.makedirs(directory)
+        with open(os.path.join(directory, "values.yaml"), "w", encoding="utf-8") as f:
+            f.write(f"image:\n  repository: ghcr.io/gripinvest/svc-{i}\n  tag: v1.0.0\n")
+    git("add", ".", cwd=seed)
+    git("commit", "--quiet", "-m", "seed", cwd=seed)
+    git("push", "--quiet", remote, "main", cwd=seed)
+    return remote
+
+
+# Every deployer's edit must have survived the others
+def lost_edits(remote, deployers):
+    lost = []
+    for i in range(deployers):
+        content = git("-C", remote, "show", f"main:services/svc-{i}/values.yaml")
+        if f"tag: v2.0.{i}" not in content:
+            lost.append(f"svc-{i}")
+    return lost
+
+
+def summarize(path, deployers, pushed, lost, remote, attempts, elapsed):
+    return {
+        "benchmark": "concurrent_deploy", "path": path, "deployers": deployers, "pushed": pushed, "lost_edits": lost,
+        "commits": int(git("-C", remote, "rev-list", "--count", "main").strip()),
+        "attempts": {"min": min(attempts), "mean": round(sum(attempts) / len(attempts), 2), "max": max(attempts),
+                     "total": sum(attempts)},
+        "seconds": round(elapsed, 3), "deploys_per_second": round(deployers / elapsed, 2),
+    }
+
+
+# manifest_commit.commit_tag_changes: plumbing commits in a bare mirror, retried on a new head
+def race_plumbing(root, deployers, max_attempts):
+    remote = create_remote(root, deployers)
+    url = f"file://{remote}" if remote.startswith("/") else f"file:///{remote.replace(os.sep, '/')}"
+    start_line = threading.Barrier(deployers)
+
+    # Each deployer has its own mirror, as separate Jenkins agents would, and its own service and tag
+    def deploy(i):
+        mirror = os.path.join(root, f"mirror-{i}.git")
+        rewriter = TagRewriter(f"v2.0.{i}", f"svc-{i}")
+        start_line.wait()
+        return commit_tag_changes(mirror, url, "main", rewriter, f"Updated svc-{i} to v2.0.{i}",
+                                  max_attempts=max_attempts, backoff=0.05)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=deployers) as pool:
+        results = list(pool.map(deploy, range(deployers)))
+    elapsed = time.perf_counter() - start
+
+    for i, result in enumerate(results):
+        print(json.dumps(dict(result.to_dict(), path="plumbing", deployer=i)), file=sys.stderr)
+    return summarize("plumbing", deployers, sum(1 for result in results if result.pushed),
+                     lost_edits(remote, deployers), remote, [result.attempts for result in results], elapsed)
+
+
+# deployment.Deployment.deploy: sparse checkout, commit and push, re-applied with reapply() on a
+# rejected push. The GitHub URL it pushes to is redirected to the local bare repo
+def race_checkout(root, deployers, max_attempts):
+    remote = create_remote(root, deployers)
+    redirect_github(root)
+    start_at = time.time() + 0.5 + 0.05 * deployers
+
+    processes = []
+    for i in range(deployers):
+        # Own working directory, mirror cache and manifest index per deployer
+        agent = os.path.join(root, f"agent-{i}")
+        os.makedirs(agent)
+        env = dict(os.environ, HOME=agent, USERPROFILE=agent, GIT_MIRROR_DIR=os.path.join(agent, "mirrors"))
+        processes.append(subprocess.Popen(
+            [sys.executable, "-c", CHECKOUT_DEPLOYER, ROOT, str(start_at), str(i), str(max_attempts), TOKEN, REPO, OWNER],
+            cwd=agent, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True))
+
+    pushed = 0
+    attempts = []
+    for i, process in enumerate(processes):
+        output, _ = process.communicate()
+        pushed += 1 if process.returncode == 0 else 0
+        # One "Push rejected" line per retry
+        attempts.append(1 + output.count("Push rejected"))
+        print(json.dumps({"path": "checkout", "deployer": i, "pushed": process.returncode == 0,
+                          "attempts": attempts[-1], "output": output.strip().splitlines()[-1:]}), file=sys.stderr)
+    elapsed = time.time() - start_at
+    return summarize("checkout", deployers, pushed, lost_edits(remote, deployers), remote, attempts, elapsed)
+
+
+RACES = {"plumbing": race_plumbing, "checkout": race_checkout}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Race N deployers against one local bare repo")
+    parser.add_argument("--deployers", type=int, default=8)
+    parser.add_argument("--max-attempts", type=int, default=20)
+    parser.add_argument("--path", choices=sorted(RACES) + ["both"], default="both",
+                        help="Clone-free plumbing deployers, Deployment.deploy through a checkout, or both")
+    args = parser.parse_args()
+
+    failed = False
+    for path in sorted(RACES) if args.path == "both" else [args.path]:
+        root = tempfile.mkdtemp(prefix=f"concurrent-deploy-{path}-")
+        try:
+            summary = RACES[path](root, args.deployers, args.max_attempts)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+        print(json.dumps(summary))
+        failed = failed or summary["pushed"] != args.deployers or bool(summary["lost_edits"])
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
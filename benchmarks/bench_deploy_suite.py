@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from deployment import clone_or_pull_repo, commitAndPushChanges, make_rewriter, update_tag
+from manifest_commit import commit_tag_changes
+from manifest_index import ManifestIndex
+from manifest_scan import scan_tree
+from synthetic_argocd import create_remote, generate_tree, git, target_services
+
+OWNER = "gripinvest"
+REPO = "argocd-prod"
+BRANCH = "main"
+TOKEN = "bench"
+
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "deploy_suite.json")
+
+# How each deployment script updates the manifests
+PROFILES = {
+    "production_deployment_all": {"strategy": "generic", "index": True},
+    "production_deployment": {"strategy": "sirius", "index": False},
+    "CD": {"strategy": "generic", "index": False},
+    "no_checkout": {"strategy": "generic", "no_checkout": True},
+}
+
+PHASES = ("sync", "scan", "rewrite", "commit_push")
+
+
+# The scripts print per-file progress and git prints to the same stdout; keep the JSON clean
+@contextmanager
+def silenced(enabled=True):
+    if not enabled:
+        yield
+        return
+    sys.stdout.flush()
+    saved = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(devnull)
+        os.close(saved)
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    value = function(*args, **kwargs)
+    return value, round((time.perf_counter() - start) * 1000, 1)
+
+
+# The scripts push to https://<token>@github.com/<owner>/<repo>.git; point that at the local remotes
+def redirect_github(remotes_dir):
+    base = "file://" + remotes_dir.replace(os.sep, "/").rstrip("/") + "/"
+    if not base.startswith("file:///"):
+        base = base.replace("file://", "file:///", 1)
+    os.environ.update({
+        "GIT_CONFIG_COUNT": "1",
+        "GIT_CONFIG_KEY_0": f"url.{base}.insteadOf",
+        "GIT_CONFIG_VALUE_0": f"https://{TOKEN}@github.com/{OWNER}/",
+    })
+    for variable, value in (("GIT_AUTHOR_NAME", "bench"), ("GIT_AUTHOR_EMAIL", "bench@localhost"),
+                            ("GIT_COMMITTER_NAME", "bench"), ("GIT_COMMITTER_EMAIL", "bench@localhost")):
+        os.environ.setdefault(variable, value)
+    return base
+
+
+# One round of a deployment through a working tree: sync, scan, rewrite, commit and push
+def checkout_round(profile, workdir, targets, tag, index_path):
+    row = {}
+    repo_path = os.path.join(workdir, REPO)
+    services = os.path.join(repo_path, "services")
+    _, row["sync"] = timed(clone_or_pull_repo, TOKEN, OWNER, REPO, BRANCH)
+
+    # Scan: what it costs to know where the targets are before changing anything
+    index = None
+    if profile["index"]:
+        index = ManifestIndex(repo_path, path=index_path)
+        _, row["scan"] = timed(index.refresh)
+    else:
+        _, row["scan"] = timed(scan_tree, services, make_rewriter(profile["strategy"], tag, "gi-none"))
+
+    updated, row["rewrite"] = timed(update_tag, services, tag, targets, index, strategy=profile["strategy"])
+    row["files_updated"] = len(git("-C", repo_path, "status", "--porcelain", "--", "services").splitlines())
+
+    row["commit_push"] = None
+    if updated:
+        pushed, row["commit_push"] = timed(commitAndPushChanges, TOKEN, OWNER, REPO, BRANCH, f"Updated tag to {tag}")
+        os.chdir(workdir)
+        row["pushed"] = pushed
+    return row
+
+
+# One round of the clone-free path: the rewrite happens in memory inside commit_tag_changes
+def no_checkout_round(mirror_path, url, targets, tag):
+    rewriter = make_rewriter("generic", tag, targets)
+    result, elapsed = timed(commit_tag_changes, mirror_path, url, BRANCH, rewriter, f"Updated tag to {tag}")
+    return {"sync": None, "scan": None, "rewrite": None, "commit_push": elapsed, "files_updated": len(result.files),
+            "pushed": result.pushed}
+
+
+def summarize(rows):
+    summary = {}
+    for phase in PHASES:
+        values = [row[phase] for row in rows if row.get(phase) is not None]
+        # The first round is cold (empty mirror, no index); later rounds show the steady state
+        warm = values[1:] or values
+        summary[phase] = {"cold_ms": values[0], "warm_median_ms": round(statistics.median(warm), 1)} if values else None
+    return summary
+
+
+# Phases whose warm median grew by more than tolerance (and min_ms) against a previous run
+def regressions(current, baseline, tolerance, min_ms):
+    found = []
+    for name, phases in current.items():
+        for phase, value in phases.items():
+            before = (baseline.get(name) or {}).get(phase)
+            if not value or not before:
+                continue
+            old, new = before["warm_median_ms"], value["warm_median_ms"]
+            if new > old * (1 + tolerance) and new - old > min_ms:
+                found.append({"profile": name, "phase": phase, "baseline_ms": old, "current_ms": new})
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time scan, rewrite and commit/push of each deployment strategy "
+                                                 "on a synthetic argocd-prod against a local bare remote")
+    parser.add_argument("--services", type=int, default=200)
+    parser.add_argument("--files", type=int, default=3, help="Values files per service")
+    parser.add_argument("--sirius", type=int, default=2, help="gi-sirius sub-services per service")
+    parser.add_argument("--blocks", type=int, default=4, help="Image tag blocks per file")
+    parser.add_argument("--padding", type=int, default=0, help="Extra comment lines per file")
+    parser.add_argument("--targets", type=int, default=10, help="Services deployed per round")
+    parser.add_argument("--rounds", type=int, default=4, help="Deployments per profile; the first one is cold")
+    parser.add_argument("--profiles", default=",".join(PROFILES), help="Comma-separated profiles to run")
+    parser.add_argument("--output", default=RESULTS_PATH, help="Where to write the JSON results")
+    parser.add_argument("--baseline", help="Earlier results to compare with; exit 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline")
+    parser.add_argument("--min-ms", type=float, default=20, help="Ignore slowdowns smaller than this")
+    parser.add_argument("--verbose", action="store_true", help="Keep the scripts' own output")
+    args = parser.parse_args()
+
+    profiles = [name.strip() for name in args.profiles.split(",") if name.strip()]
+    unknown = [name for name in profiles if name not in PROFILES]
+    if unknown:
+        parser.error(f"unknown profiles: {', '.join(unknown)}")
+
+    root = tempfile.mkdtemp(prefix="deploy-suite-")
+    start_dir = os.getcwd()
+    try:
+        tree = generate_tree(os.path.join(root, "tree"), args.services, args.files, args.sirius, args.blocks,
+                             args.padding)
+        pristine = create_remote(os.path.join(root, "pristine.git"), os.path.join(root, "tree"), BRANCH)
+        targets = target_services(args.targets, args.sirius)
+
+        results = {}
+        rows = []
+        for name in profiles:
+            profile = PROFILES[name]
+            # Fresh remote, mirror cache and working directory per profile
+            remotes_dir = os.path.join(root, name, "remotes")
+            remote = os.path.join(remotes_dir, f"{REPO}.git")
+            shutil.copytree(pristine, remote)
+            base = redirect_github(remotes_dir)
+            os.environ["GIT_MIRROR_DIR"] = os.path.join(root, name, "mirrors")
+            workdir = os.path.join(root, name, "work")
+            os.makedirs(workdir)
+            os.chdir(workdir)
+
+            profile_rows = []
+            for round_number in range(args.rounds):
+                tag = f"v2.0.{round_number}"
+                with silenced(not args.verbose):
+                    if profile.get("no_checkout"):
+                        row = no_checkout_round(os.path.join(root, name, "mirror.git"), f"{base}{REPO}.git", targets, tag)
+                    else:
+                        row = checkout_round(profile, workdir, targets, tag, os.path.join(root, name, "index.json"))
+                row = dict(row, profile=name, round=round_number)
+                profile_rows.append(row)
+                print(json.dumps(row), file=sys.stderr)
+            os.chdir(start_dir)
+
+            rows.extend(profile_rows)
+            results[name] = summarize(profile_rows)
+    finally:
+        os.chdir(start_dir)
+        shutil.rmtree(root, ignore_errors=True)
+
+    output = {
+        "benchmark": "deploy_suite", "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "tree": dict(tree, files_per_service=args.files, sirius_per_service=args.sirius, blocks_per_file=args.blocks,
+                     padding=args.padding),
+        "targets": args.targets, "rounds": args.rounds, "results": results, "rows": rows,
+    }
+
+    failed = False
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            found = regressions(results, json.load(f)["results"], args.tolerance, args.min_ms)
+        output["regressions"] = found
+        failed = bool(found)
+    failed = failed or any(row.get("pushed") is False for row in rows)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
+    print(json.dumps({key: output[key] for key in output if key != "rows"}))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from manifest_rewrite import TagRewriter
+from manifest_scan import scan_tree
+
+ENVIRONMENTS = ("dev", "staging", "prod")
+
+
+# services/<svc>/overlays/<env>/values.yaml for `count` files, each with a generic and a gi-sirius image
+def generate_tree(root, count, padding):
+    services = max(1, count // len(ENVIRONMENTS))
+    for i in range(count):
+        service, env = i % services, ENVIRONMENTS[i // services % len(ENVIRONMENTS)]
+        directory = os.path.join(root, "services", f"svc-{service}", "overlays", f"{env}-{i // (services * 3)}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "values.yaml"), "w", encoding="utf-8") as f:
+            f.write(
+                f"app:\n"
+                f"  repository: ghcr.io/gripinvest/gi-svc-{service}\n"
+                f"  tag: v1.0.0\n"
+                f"sidecar:\n"
+                f"  repository: ghcr.io/gripinvest/sirius/gi-sirius-svc-{service}\n"
+                f"  tag: v1.0.0\n"
+                + "# padding\n" * padding
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the recursive manifest scanner by pool mode")
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--padding", type=int, default=200, help="Extra lines per file")
+    parser.add_argument("--targets", type=int, default=50, help="Services to update")
+    parser.add_argument("--workers", default="1,4,8", help="Comma-separated worker counts")
+    parser.add_argument("--processes", action="store_true", help="Also time the process pool")
+    parser.add_argument("--patch", action="store_true", help="Also time mmap patching on the thread pool")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="manifest-scan-")
+    try:
+        generate_tree(root, args.files, args.padding)
+        directory = os.path.join(root, "services")
+        modes = [("threads", False, False)]
+        if args.processes:
+            modes.append(("processes", True, False))
+        if args.patch:
+            modes.append(("patch", False, True))
+
+        results = []
+        tag = 0
+        for mode, processes, patch in modes:
+            for workers in [int(value) for value in args.workers.split(",")]:
+                # A fresh tag each round so every round rewrites the same number of files
+                tag += 1
+                targets = ",".join(f"gi-svc-{i}" for i in range(args.targets))
+                _, stats = scan_tree(directory, TagRewriter(f"v2.0.{tag}", targets), workers, processes, patch)
+                row = dict(stats.as_dict(), requested_mode=mode, requested_workers=workers,
+                           files_per_second=round(stats.files / stats.seconds["wall"], 1))
+                results.append(row)
+                print(json.dumps(row), file=sys.stderr)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print(json.dumps({"benchmark": "manifest_scan", "files": args.files, "results": results}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
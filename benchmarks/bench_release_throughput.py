@@ -0,0 +1,110 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_github import FakeGitHub, synthetic_fixture
+
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "release_throughput.json")
+
+
+# One full run of Production_release_newtest.py against a freshly seeded fake GitHub,
+# with cold HTTP cache, tag index and journal, as on a new Jenkins agent
+def release_run(args, concurrency, batch):
+    fixture = synthetic_fixture(args.repos, args.changed, args.tags)
+    # synthetic_fixture gives the first `changed` repos unreleased commits
+    repos = list(fixture["repos"])
+    expected = sorted(repos[:args.changed])
+    github = FakeGitHub(fixture, port=0, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                        rate_limit=args.rate_limit, rate_window=args.rate_window, graphql_limit=args.rate_limit,
+                        seed=args.seed)
+    scratch = tempfile.mkdtemp(prefix="release-throughput-")
+    try:
+        # Keep stdout for the JSON results
+        with redirect_stdout(sys.stderr):
+            github.start()
+        env = dict(os.environ, GITHUB_API_URL=github.address,
+                   GITHUB_HTTP_CACHE=os.path.join(scratch, "http-cache.json"),
+                   GITHUB_TAG_INDEX=os.path.join(scratch, "tag-index.json"),
+                   GITHUB_MAX_RETRIES=str(args.max_retries), GITHUB_RETRY_BACKOFF=str(args.retry_backoff))
+        command = [sys.executable, os.path.join(ROOT, "Production_release_newtest.py"), "develop", args.release_tag,
+                   ",".join(repos), "fake-token", "--concurrency", str(concurrency),
+                   "--journal", os.path.join(scratch, "journal.json")]
+        if batch:
+            command.append("--batch")
+
+        start = time.perf_counter()
+        process = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, timeout=args.timeout)
+        seconds = time.perf_counter() - start
+        stats = github.snapshot()
+    finally:
+        github.stop()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    lines = process.stdout.strip().splitlines()
+    try:
+        released = sorted(json.loads(lines[-1])) if lines else []
+    except ValueError:
+        released = []
+    return {
+        "concurrency": concurrency, "batch": batch, "exit_code": process.returncode, "seconds": round(seconds, 3),
+        "repos_per_second": round(args.repos / seconds, 2), "released": len(released),
+        "expected_released": len(expected), "correct": released == expected,
+        "client_retries": process.stdout.count("retrying in"), "requests": stats["requests"],
+        "routes": stats["routes"], "statuses": stats["statuses"], "injected_errors": stats["injected_errors"],
+        "rate_limited": stats["rate_limited"], "max_in_flight": stats["max_in_flight"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of a release run over many repos against the local fake GitHub")
+    parser.add_argument("--repos", type=int, default=50)
+    parser.add_argument("--changed", type=int, default=30, help="Repos with unreleased commits")
+    parser.add_argument("--tags", type=int, default=30, help="Existing release tags per repo")
+    parser.add_argument("--concurrency", default="1,4,8,16", help="Comma-separated --concurrency values")
+    parser.add_argument("--batch", choices=["off", "on", "both"], default="both", help="Runs with the GraphQL batch lookup")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds the fake server adds per request")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with a 502")
+    parser.add_argument("--rate-limit", type=int, default=5000, help="Requests per --rate-window before 403s")
+    parser.add_argument("--rate-window", type=float, default=3600)
+    parser.add_argument("--max-retries", type=int, default=5, help="GITHUB_MAX_RETRIES for the release script")
+    parser.add_argument("--retry-backoff", type=float, default=1.0, help="GITHUB_RETRY_BACKOFF for the release script")
+    parser.add_argument("--release-tag", default="v9.0.0")
+    parser.add_argument("--timeout", type=float, default=900, help="Seconds before a release run is abandoned")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=RESULTS_PATH, help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    batches = {"off": [False], "on": [True], "both": [False, True]}[args.batch]
+    rows = []
+    for batch in batches:
+        for concurrency in [int(value) for value in args.concurrency.split(",")]:
+            row = release_run(args, concurrency, batch)
+            rows.append(row)
+            print(json.dumps(row), file=sys.stderr)
+
+    output = {
+        "benchmark": "release_throughput", "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "repos": args.repos,
+        "changed": args.changed, "latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate,
+        "rate_limit": args.rate_limit, "max_retries": args.max_retries, "retry_backoff": args.retry_backoff,
+        "results": rows,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
+    print(json.dumps(output))
+    return 0 if all(row["correct"] and row["exit_code"] == 0 for row in rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
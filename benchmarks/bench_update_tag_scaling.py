@@ -0,0 +1,97 @@
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from manifest_rewrite import SiriusBlockRewriter
+
+
+# One values file holding `count` gi-sirius services, tag not adjacent to repository
+def generate_values(count):
+    blocks = []
+    for i in range(count):
+        blocks.append(
+            f"gi-sirius-svc-{i}:\n"
+            f"  replicaCount: 2\n"
+            f"  image:\n"
+            f"    repository: ghcr.io/gripinvest/sirius/gi-sirius-svc-{i}\n"
+            f"    pullPolicy: IfNotPresent\n"
+            f"    tag: v1.0.{i}\n"
+            f"  resources:\n"
+            f"    limits:\n"
+            f"      cpu: 500m\n"
+        )
+    return "\n".join(blocks)
+
+
+# The findall + re.sub-per-match loop production_deployment.update_tag used before
+def legacy_rewrite(content, new_tag, allowed_suffixes):
+    updated_content = content
+    pattern = re.compile(
+        r"(repository:\s*ghcr\.io/gripinvest/[-\w]+/(gi-sirius-([\w-]+))\s*)([\s\S]*?)(tag:\s*)v[\d.]+",
+        re.MULTILINE
+    )
+    for repo_line, full_repo, suffix, middle_block, tag_line in pattern.findall(content):
+        if suffix in allowed_suffixes:
+            updated_content = re.sub(
+                rf"{re.escape(repo_line)}{re.escape(middle_block)}{tag_line}v[\d.]+",
+                f"{repo_line}{middle_block}{tag_line}{new_tag}",
+                updated_content
+            )
+    return updated_content
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmark for the production_deployment.py tag rewrite")
+    parser.add_argument("--sizes", default="25,50,100,200,400,800", help="Comma-separated service counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--legacy", action="store_true", help="Also time the previous re.sub-per-match loop")
+    parser.add_argument("--max-growth", type=float, default=3.0,
+                        help="Fail when time per service grows by more than this factor from the smallest size")
+    args = parser.parse_args()
+
+    new_tag = "v9.9.9"
+    results = []
+    for count in [int(size) for size in args.sizes.split(",")]:
+        content = generate_values(count)
+        targets = ",".join(f"gi-svc-{i}" for i in range(count))
+        rewriter = SiriusBlockRewriter(new_tag, targets)
+
+        elapsed, (updated, names) = best_of(args.repeat, lambda: rewriter.rewrite(content))
+        assert len(names) == count and updated.count(f"tag: {new_tag}") == count
+        row = {"services": count, "bytes": len(content), "seconds": round(elapsed, 6),
+               "us_per_service": round(elapsed / count * 1e6, 2)}
+
+        if args.legacy:
+            allowed = rewriter.allowed_suffixes
+            legacy_elapsed, legacy_updated = best_of(args.repeat, lambda: legacy_rewrite(content, new_tag, allowed))
+            assert legacy_updated == updated
+            row["legacy_seconds"] = round(legacy_elapsed, 6)
+            row["legacy_us_per_service"] = round(legacy_elapsed / count * 1e6, 2)
+
+        results.append(row)
+        print(json.dumps(row), file=sys.stderr)
+
+    growth = results[-1]["us_per_service"] / results[0]["us_per_service"]
+    summary = {"benchmark": "update_tag_scaling", "results": results,
+               "per_service_growth": round(growth, 2), "flat": growth <= args.max_growth}
+    print(json.dumps(summary))
+    return 0 if summary["flat"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ENVIRONMENTS = ("dev", "staging", "prod")
+
+
+def git(*args, cwd=None):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+def generic_block(name, tag):
+    return (
+        f"{name}:\n"
+        f"  image:\n"
+        f"    repository: ghcr.io/gripinvest/{name}\n"
+        f"    tag: {tag}\n"
+    )
+
+
+# gi-sirius images keep other keys between repository and tag, as in argocd-prod
+def sirius_block(suffix, tag):
+    return (
+        f"gi-sirius-{suffix}:\n"
+        f"  replicaCount: 2\n"
+        f"  image:\n"
+        f"    repository: ghcr.io/gripinvest/sirius/gi-sirius-{suffix}\n"
+        f"    pullPolicy: IfNotPresent\n"
+        f"    tag: {tag}\n"
+        f"  resources:\n"
+        f"    limits:\n"
+        f"      cpu: 500m\n"
+    )
+
+
+# Service names a deployment of the first `count` services asks for: gi-svc-<i> and its
+# gi-svc-<i>-<j> sub-services, whose images are gi-sirius-svc-<i>-<j>
+def target_services(count, sirius):
+    names = []
+    for i in range(count):
+        names.append(f"gi-svc-{i}")
+        names.extend(f"gi-svc-{i}-{j}" for j in range(sirius))
+    return ",".join(names)
+
+
+# Write a synthetic argocd-prod services/ tree under root:
+# services/gi-svc-<i>/overlays/<env>/values.yaml, `files` per service. Each file holds the
+# service's generic image, its `sirius` gi-sirius sub-service images, then images of
+# shared sidecars up to `blocks` tag blocks, and `padding` comment lines.
+def generate_tree(root, services, files=3, sirius=2, blocks=4, padding=0, tag="v1.0.0"):
+    summary = {"services": services, "files": 0, "blocks": 0, "bytes": 0}
+    for i in range(services):
+        parts = [generic_block(f"gi-svc-{i}", tag)]
+        parts.extend(sirius_block(f"svc-{i}-{j}", tag) for j in range(sirius))
+        parts.extend(generic_block(f"gi-sidecar-{k}", tag) for k in range(max(0, blocks - len(parts))))
+        content = "\n".join(parts) + "# padding\n" * padding
+
+        for f in range(files):
+            env = ENVIRONMENTS[f % len(ENVIRONMENTS)]
+            directory = os.path.join(root, "services", f"gi-svc-{i}", "overlays", f"{env}-{f // len(ENVIRONMENTS)}")
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, "values.yaml"), "w", encoding="utf-8") as out:
+                out.write(content)
+            summary["files"] += 1
+            summary["blocks"] += len(parts)
+            summary["bytes"] += len(content)
+    return summary
+
+
+# Bare repository holding the tree under root as one commit on branch, standing in for GitHub
+def create_remote(remote_path, tree_root, branch="main"):
+    seed = tempfile.mkdtemp(prefix="synthetic-seed-")
+    try:
+        git("init", "--quiet", "--bare", remote_path)
+        git("-C", remote_path, "config", "uploadpack.allowFilter", "true")
+        git("init", "--quiet", "-b", branch, seed)
+        shutil.copytree(os.path.join(tree_root, "services"), os.path.join(seed, "services"))
+        git("add", ".", cwd=seed)
+        git("-c", "user.name=bench", "-c", "user.email=bench@localhost", "commit", "--quiet", "-m", "seed", cwd=seed)
+        git("push", "--quiet", remote_path, branch, cwd=seed)
+    finally:
+        shutil.rmtree(seed, ignore_errors=True)
+    return remote_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic argocd-prod services/ tree")
+    parser.add_argument("output", help="Directory to write services/ into")
+    parser.add_argument("--services", type=int, default=100)
+    parser.add_argument("--files", type=int, default=3, help="Values files per service")
+    parser.add_argument("--sirius", type=int, default=2, help="gi-sirius sub-services per service")
+    parser.add_argument("--blocks", type=int, default=4, help="Image tag blocks per file")
+    parser.add_argument("--padding", type=int, default=0, help="Extra comment lines per file")
+    parser.add_argument("--remote", help="Also create a bare repository here with the tree on --branch")
+    parser.add_argument("--branch", default="main")
+    args = parser.parse_args()
+
+    summary = generate_tree(args.output, args.services, args.files, args.sirius, args.blocks, args.padding)
+    if args.remote:
+        create_remote(args.remote, args.output, args.branch)
+        summary["remote"] = args.remote
+    print(json.dumps(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
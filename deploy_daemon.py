@@ -0,0 +1,302 @@
+import argparse
+import hmac
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from git_mirror import ensure_mirror, fetch_branch, mirror_path_for
+from manifest_commit import commit_tag_changes
+from manifest_rewrite import TagRewriter
+from release_manifest import TAG_FORMAT, describe
+
+DEFAULT_PORT = 8788
+
+
+# One deploy request waiting for the batch it lands in
+class DeployRequest:
+    def __init__(self, request_id, tags):
+        self.id = request_id
+        self.tags = tags
+        self.received = time.time()
+        self.done = threading.Event()
+        self.result = None
+
+
+class DeployHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self.reply(404, {"message": "not found"})
+            return
+        self.reply(200, self.server.daemon.status())
+
+    def do_POST(self):
+        daemon = self.server.daemon
+        if self.path != "/deploy":
+            self.reply(404, {"message": "not found"})
+            return
+        if daemon.secret and not hmac.compare_digest(self.headers.get("X-Deploy-Token") or "", daemon.secret):
+            self.reply(401, {"message": "invalid deploy token"})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            tags = parse_request(json.loads(self.rfile.read(length)))
+        except ValueError as e:
+            self.reply(400, {"message": str(e)})
+            return
+
+        request = daemon.submit(tags)
+        if not request.done.wait(daemon.request_timeout):
+            self.reply(504, {"id": request.id, "message": "deployment did not finish in time"})
+            return
+        self.reply(200 if request.result["ok"] else 502, request.result)
+
+
+# {service: tag} from {"services": {service: tag}} or {"tag": "vX.Y.Z", "services": "a,b" | ["a", "b"]}
+def parse_request(payload):
+    if not isinstance(payload, dict):
+        raise ValueError("expected a JSON object")
+    services = payload.get("services")
+    if isinstance(services, dict):
+        tags = dict((str(service).strip(), str(tag).strip()) for service, tag in services.items())
+    else:
+        if isinstance(services, str):
+            services = services.split(",")
+        if not isinstance(services, list) or not payload.get("tag"):
+            raise ValueError("expected 'services' as a mapping of service to tag, or 'tag' with a list of services")
+        tags = dict((str(service).strip(), str(payload["tag"]).strip()) for service in services if str(service).strip())
+
+    if not tags:
+        raise ValueError("no services to deploy")
+    for service, tag in tags.items():
+        if not TAG_FORMAT.match(tag):
+            raise ValueError(f"invalid tag '{tag}' for {service}, use the format vX.Y.Z")
+    return tags
+
+
+# Long-running deployer for one GitOps repo. The bare mirror stays warm between
+# deployments and the manifest blobs of the branch head are kept in memory.
+# Requests that arrive within `window` seconds of the first one are merged and
+# deployed as one commit/push; each caller gets its own per-service result.
+class DeployDaemon:
+    def __init__(self, url, branch, mirror_path, window=0.5, host="127.0.0.1", port=DEFAULT_PORT, secret=None,
+                 max_attempts=5, request_timeout=300):
+        self.url = url
+        self.branch = branch
+        self.mirror_path = mirror_path
+        self.window = window
+        self.secret = secret
+        self.max_attempts = max_attempts
+        self.request_timeout = request_timeout
+        self.condition = threading.Condition()
+        self.pending = []
+        self.ids = itertools.count(1)
+        self.blob_cache = {}
+        self.stats = {"requests": 0, "batches": 0, "commits": 0, "failed_batches": 0}
+        self.last_commit = None
+        self.running = False
+        self.server = ThreadingHTTPServer((host, port), DeployHandler)
+        self.server.daemon = self
+        self.threads = []
+
+    @property
+    def address(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        # Warm up: create the mirror and fetch the branch before the first request
+        ensure_mirror(self.mirror_path, self.url)
+        fetch_branch(self.mirror_path, self.branch)
+        self.running = True
+        for target in (self.server.serve_forever, self.run):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        print(f"Accepting deploy requests for {self.branch} on {self.address}/deploy (window {self.window}s)")
+        return self
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def status(self):
+        with self.condition:
+            return dict(self.stats, pending=len(self.pending), branch=self.branch, last_commit=self.last_commit,
+                        window=self.window)
+
+    def submit(self, tags):
+        with self.condition:
+            request = DeployRequest(next(self.ids), tags)
+            self.pending.append(request)
+            self.stats["requests"] += 1
+            self.condition.notify_all()
+        return request
+
+    # Take everything that arrives within the window after the first pending request
+    def next_batch(self):
+        with self.condition:
+            while self.running and not self.pending:
+                self.condition.wait()
+            if not self.running:
+                return []
+            deadline = self.pending[0].received + self.window
+        remaining = deadline - time.time()
+        if remaining > 0:
+            time.sleep(remaining)
+        with self.condition:
+            batch, self.pending = self.pending, []
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.next_batch()
+            if not batch:
+                return
+            try:
+                self.deploy_batch(batch)
+            except Exception as e:
+                error = e.stderr.decode(errors="replace").strip() if isinstance(e, subprocess.CalledProcessError) and e.stderr else str(e)
+                print(f"Deploy batch of {len(batch)} requests failed: {error}")
+                with self.condition:
+                    self.stats["failed_batches"] += 1
+                for request in batch:
+                    request.result = {"id": request.id, "ok": False, "error": error, "batch_size": len(batch)}
+                    request.done.set()
+
+    def deploy_batch(self, batch):
+        # Later requests win when two ask for the same service
+        merged = {}
+        owners = {}
+        for request in batch:
+            for service, tag in request.tags.items():
+                merged[service] = tag
+                owners[service] = request
+
+        rewriter = TagRewriter(None, "", merged)
+        result = commit_tag_changes(self.mirror_path, self.url, self.branch, rewriter, f"Updated tags: {describe(merged)}",
+                                    max_attempts=self.max_attempts, blob_cache=self.blob_cache)
+        ok = result.pushed or not result.files
+        print(f"Deployed batch of {len(batch)} requests ({len(merged)} services): "
+              f"{'commit ' + result.commit[:12] if result.pushed else result.error or 'no changes'}")
+
+        with self.condition:
+            self.stats["batches"] += 1
+            self.stats["commits"] += 1 if result.pushed else 0
+            if result.pushed:
+                self.last_commit = result.commit
+
+        for request in batch:
+            services = {}
+            for service, tag in request.tags.items():
+                if owners[service] is not request and merged[service] != tag:
+                    services[service] = {"tag": tag, "status": "superseded", "by": owners[service].id,
+                                         "deployed_tag": merged[service]}
+                    continue
+                targets = TagRewriter(tag, service).targets
+                names = set(targets[2]) | set(targets[3])
+                files = sorted(set(path for name in names for path in result.locations.get(name, [])))
+                services[service] = {"tag": tag, "status": "updated" if files and ok else "unchanged" if ok else "failed",
+                                     "files": files}
+            request.result = {
+                "id": request.id, "ok": ok, "commit": result.commit if result.pushed else None, "base": result.base,
+                "attempts": result.attempts, "error": result.error, "batch_size": len(batch), "services": services,
+                "latency": round(time.time() - request.received, 3),
+            }
+            request.done.set()
+
+
+# Send one deploy request to a running daemon and return (HTTP status, result)
+def send_request(address, tags, secret=None, timeout=330):
+    body = json.dumps({"services": tags}).encode("utf-8")
+    request = urllib.request.Request(f"{address.rstrip('/')}/deploy", data=body, method="POST",
+                                     headers={"Content-Type": "application/json"})
+    if secret:
+        request.add_header("X-Deploy-Token", secret)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+
+
+def serve(args):
+    if args.remote:
+        url = args.remote
+    else:
+        token = os.environ.get(args.token_env)
+        if not token:
+            print(f"Set {args.token_env} to a GitHub token with push access, or pass --remote", file=sys.stderr)
+            return 1
+        url = f"https://{token}@github.com/{args.owner}/{args.repo}.git"
+
+    secret = os.environ.get(args.secret_env) if args.secret_env else None
+    daemon = DeployDaemon(url, args.branch, args.mirror or mirror_path_for(args.owner, args.repo), args.window,
+                          args.host, args.port, secret, args.max_attempts)
+    daemon.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        daemon.stop()
+    return 0
+
+
+def deploy(args):
+    tags = dict((service.strip(), args.tag) for service in args.services.split(",") if service.strip())
+    secret = os.environ.get(args.secret_env) if args.secret_env else None
+    status, result = send_request(args.address, tags, secret)
+    print(json.dumps(result))
+    return 0 if status == 200 else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coalescing deployment daemon for a GitOps repo")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Run the daemon")
+    serve_parser.add_argument("--owner", default="gripinvest")
+    serve_parser.add_argument("--repo", default="argocd-prod")
+    serve_parser.add_argument("--branch", default="main")
+    serve_parser.add_argument("--remote", help="Remote URL to use instead of github.com/<owner>/<repo> (e.g. file:///path/repo.git)")
+    serve_parser.add_argument("--token-env", default="GITHUB_TOKEN", help="Environment variable holding the GitHub token")
+    serve_parser.add_argument("--mirror", help="Bare mirror to keep warm (default: the shared mirror cache)")
+    serve_parser.add_argument("--window", type=float, default=0.5, help="Seconds to collect requests into one commit")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("--secret-env", help="Environment variable holding a token callers must send as X-Deploy-Token")
+    serve_parser.add_argument("--max-attempts", type=int, default=5)
+
+    deploy_parser = commands.add_parser("deploy", help="Send a deploy request to a running daemon")
+    deploy_parser.add_argument("tag", help="New released tag, e.g. v18.0.0")
+    deploy_parser.add_argument("services", help="Comma-separated services to update")
+    deploy_parser.add_argument("--address", default=f"http://127.0.0.1:{DEFAULT_PORT}")
+    deploy_parser.add_argument("--secret-env", help="Environment variable holding the daemon's deploy token")
+
+    args = parser.parse_args()
+    return serve(args) if args.command == "serve" else deploy(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
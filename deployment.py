@@ -0,0 +1,384 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+# Only stdlib modules are imported up front. The GitHub client (requests), the
+# scanner, the index and the plumbing commit path are imported by the functions
+# that use them, so `--help`, `--where` and in-process callers of update_tag do
+# not pay for what they do not run.
+
+OWNER = "gripinvest"
+
+# Matching strategies: "generic" updates ghcr.io/<owner>/<repo> images and their
+# gi-sirius-* counterparts through one regex pass (TagRewriter); "sirius" pairs
+# gi-sirius repository and tag keys by YAML structure (SiriusBlockRewriter)
+STRATEGIES = ("generic", "sirius")
+
+
+def make_rewriter(strategy, new_tag, target_repos, tags=None):
+    from manifest_rewrite import SiriusBlockRewriter, TagRewriter
+
+    if strategy == "sirius":
+        if tags:
+            raise ValueError("the sirius strategy sets one tag for all services; use the generic strategy for a release manifest")
+        return SiriusBlockRewriter(new_tag, target_repos)
+    return TagRewriter(new_tag, target_repos, tags)
+
+
+# Image names a rewriter updates, generic names and their gi-sirius-* counterparts
+def target_names(rewriter):
+    return set(rewriter.targets[2]) | set(rewriter.targets[3])
+
+
+# Check for the private repository
+def isPrivateRepo(token, owner, repo):
+    from github_client import get_client
+
+    url = f"https://api.github.com/repos/{owner}/{repo}"
+    print(url)
+
+    headers = {"Accept": "application/vnd.github.v3+json"}
+
+    if token:
+        headers["Authorization"] = f"token {token}"
+
+    response = get_client(token).get(url, headers=headers, name="isPrivateRepo")
+
+    if response.status_code == 200:
+        return response.json().get("private", False)
+    else:
+        print(f"Warning: Unable to determine reporsiotry is private ({response.status_code}). Assuming Public. ")
+        return False
+
+
+# Clone URL of the repository. A token URL works for public and private repositories
+# alike, so the visibility lookup only runs when asked for, e.g. for a fine-grained
+# token that has not been granted the repository.
+def remote_url_for(token, owner, repo, check_visibility=False):
+    if token and (not check_visibility or isPrivateRepo(token, owner, repo)):
+        return f"https://{token}@github.com/{owner}/{repo}.git"
+    return f"https://github.com/{owner}/{repo}.git"
+
+
+# function to keep a sparse checkout of the repository, backed by a cached bare mirror
+def clone_or_pull_repo(token, owner, repo, branch, check_visibility=False):
+    from git_mirror import sync_checkout
+
+    repo_path = os.path.join(os.getcwd(), repo)
+    repo_url = remote_url_for(token, owner, repo, check_visibility)
+
+    # One shallow, blobless fetch into the mirror, then a sparse checkout of services/ only
+    try:
+        sync_checkout(repo_url, owner, repo, repo_path, branch)
+        print(f"Successfully synced {repo} on branch {branch}")
+    except subprocess.CalledProcessError as e:
+        print(f"Error syncing repository {repo}: {e}")
+
+
+# function to update the value of tag in .yaml files. Safe to call in-process:
+# returns True when at least one file was updated. The index is only read here; it
+# follows commits, so the caller refreshes it once the edits are pushed.
+def update_tag(directory: str, new_tag: str, target_repos: str, index=None, workers=None, processes=False,
+               patch=False, tags=None, strategy="generic"):
+    from manifest_scan import ScanStats, rewrite_manifests, scan_tree
+
+    if not os.path.isdir(directory):
+        print(f"Error: The directory '{directory}' does not exist.")
+        return False
+
+    # Patterns and the target lookup table are built once for the whole scan
+    rewriter = make_rewriter(strategy, new_tag, target_repos, tags)
+
+    if strategy == "sirius":
+        print(f"Allowed service suffixes: {sorted(rewriter.allowed_suffixes)}")
+        index = None
+    else:
+        if tags:
+            from release_manifest import describe
+            print(f"[INFO] Release manifest: {describe(rewriter.tags)}")
+        print(f"[INFO] Allowed generic repos: {rewriter.allowed_repo_names}")
+        print(f"[INFO] Allowed gi-sirius suffixes: {rewriter.sirius_allowed_suffixes}")
+
+    # With an index only the files holding a target are opened, otherwise the whole tree is walked
+    if index is not None:
+        stats = ScanStats(source="index")
+        results = rewrite_manifests(index.files_for(target_names(rewriter)), rewriter, workers, processes, stats,
+                                    patch)
+    else:
+        results, stats = scan_tree(directory, rewriter, workers, processes, patch)
+
+    files_updated = 0
+    for result in results:
+        if result.error:
+            print(result.error)
+        if not result.updated:
+            continue
+
+        files_updated += 1
+        print(f"Tag updated in: {result.path} ({', '.join(result.updated)})")
+
+    stats.print_stats()
+    if files_updated == 0:
+        print("No matching services found. No files updated.")
+    else:
+        print(f"Total Files Updated: {files_updated}")
+
+    return files_updated > 0
+
+
+# function to handle commit and push in github.
+# A push rejected because another deployer moved the branch first is retried: the
+# clone is reset to the new remote head, reapply() makes the same tag edits again
+# and the result is committed and pushed, up to max_attempts times.
+def commitAndPushChanges(token, owner, repo, branch, commit_message, reapply=None, max_attempts=5):
+    from manifest_commit import is_push_race, retry_delay
+
+    repo_path = os.path.join(os.getcwd(), repo)
+
+    if not os.path.exists(repo_path):
+        print(f"Error: The repository '{repo} does not exist locally. clone it first")
+        return False
+
+    remote_url = f"https://{token}@github.com/{owner}/{repo}.git"
+
+    try:
+        os.chdir(repo_path)
+
+        attempt = 0
+        while True:
+            attempt += 1
+
+            # Add all the changes and commit them with user provided message
+            subprocess.run(["git", "add", "."], check=True)
+            subprocess.run(["git", "commit", "-m", commit_message], check=True)
+
+            # push changes to the specified branch
+            push_result = subprocess.run(["git", "push", remote_url, branch], capture_output=True, text=True)
+            if push_result.returncode == 0:
+                print(f"Successfully committed and pushed changes to {branch} in {repo} (attempt {attempt}).")
+                return True
+
+            if reapply is None or not is_push_race(push_result.stderr) or attempt >= max_attempts:
+                print(f"Error while pushing changes after {attempt} attempts: {push_result.stderr.strip()}")
+                return False
+
+            print(f"Push rejected, {branch} moved on. Re-applying the tag edits on the new head (attempt {attempt + 1})")
+            time.sleep(retry_delay(attempt, 0.2))
+            subprocess.run(["git", "fetch", "origin", branch], check=True)
+            subprocess.run(["git", "reset", "--hard", f"origin/{branch}"], check=True)
+            if not reapply():
+                print(f"The tags are already set on the new head of {branch}, nothing to push.")
+                return True
+
+    except subprocess.CalledProcessError as e:
+        print(f"Error while commmiting or push changes: {e}")
+        return False
+
+
+# Answer --where from the stored index, building it from the local clone if there is none yet
+def where(repo, service):
+    from manifest_index import ManifestIndex
+    from manifest_rewrite import TagRewriter
+
+    index = ManifestIndex(os.path.join(os.getcwd(), repo))
+    if not index.files and os.path.isdir(index.services_path):
+        index.refresh()
+
+    locations = index.locate(target_names(TagRewriter("", service)))
+    for name, entries in sorted(locations.items()):
+        for path, line, tag in entries:
+            print(f"{name}: {path}:{line} {tag}", file=sys.stderr)
+    print(json.dumps({name: [{"file": path, "line": line, "tag": tag} for path, line, tag in entries]
+                      for name, entries in sorted(locations.items())}))
+    return bool(locations)
+
+
+# One deployment target: which GitOps repo and branch, how manifests are matched, and how
+# changes get there. Built from the command line by main(), or directly by other tools.
+class Deployment:
+    def __init__(self, token, repo, branch, owner=OWNER, strategy="generic", no_checkout=False, use_index=True,
+                 workers=None, processes=False, patch=False, max_attempts=5, check_visibility=False):
+        self.token = token
+        self.repo = repo
+        self.branch = branch
+        self.owner = owner
+        self.strategy = strategy
+        self.no_checkout = no_checkout
+        self.use_index = use_index and strategy == "generic"
+        self.workers = workers
+        self.processes = processes
+        self.patch = patch
+        self.max_attempts = max_attempts
+        self.check_visibility = check_visibility
+
+    # Commit the tag changes straight into the bare mirror and push them, no working tree involved
+    def deploy_without_checkout(self, repo, new_tag, target_repos, tags=None, commit_message=None, branch=None):
+        from git_mirror import mirror_path_for
+        from manifest_commit import commit_tag_changes
+
+        branch = branch or self.branch
+        rewriter = make_rewriter(self.strategy, new_tag, target_repos, tags)
+        # The same authenticated URL is used to fetch and to push
+        remote_url = f"https://{self.token}@github.com/{self.owner}/{repo}.git"
+        try:
+            result = commit_tag_changes(mirror_path_for(self.owner, repo), remote_url, branch, rewriter,
+                                        commit_message or f"Updated tag to {new_tag}", max_attempts=self.max_attempts)
+        except subprocess.CalledProcessError as e:
+            print(f"Error while committing changes to {repo}: {e} {e.stderr.decode(errors='replace') if e.stderr else ''}")
+            return False
+
+        for path in result.files:
+            print(f"Tag updated in: {path}")
+        if not result.files:
+            print("No matching services found. No files updated.")
+        elif result.pushed:
+            print(f"Successfully committed and pushed {result.commit[:12]} to {branch} in {repo} "
+                  f"(attempt {result.attempts}, {result.elapsed}s).")
+        else:
+            print(f"Error while pushing changes to {repo} after {result.attempts} attempts: {result.error}")
+        return result.pushed or not result.files
+
+    # Clone/pull one GitOps repo, apply the tag changes in one scan and push them in one commit.
+    # repo and branch default to the deployment's own.
+    def deploy(self, new_tag, target_repos, tags=None, commit_message=None, repo=None, branch=None):
+        repo = repo or self.repo
+        branch = branch or self.branch
+        if self.no_checkout:
+            return self.deploy_without_checkout(repo, new_tag, target_repos, tags, commit_message, branch)
+
+        workdir = os.getcwd()
+
+        # Pull changes from github account
+        clone_or_pull_repo(self.token, self.owner, repo, branch, self.check_visibility)
+
+        # Dynamically handlle the service folder and tag update
+        services_folder = os.path.join(workdir, repo, "services")
+
+        # Check if services folder exists before proceeding
+        if not os.path.isdir(services_folder):
+            print(f"Warning: Skipping {repo} as 'services' directory does not exist.")
+            return False
+
+        # Only the files changed since the last run are re-read into the index
+        index = None
+        if self.use_index:
+            from manifest_index import ManifestIndex
+            index = ManifestIndex(os.path.join(workdir, repo))
+            reread = index.refresh()
+            print(f"Manifest index: {len(index.files)} files, {reread} re-read")
+
+        # Update the tag as new release going
+        update = lambda: update_tag(services_folder, new_tag, target_repos, index, self.workers, self.processes,
+                                    self.patch, tags, self.strategy)
+        if not update():
+            return True
+
+        # A retried push starts over on the new remote head, which may have added or moved
+        # files of the target services; the index is brought up to that head before the edits
+        def reapply():
+            if index is not None:
+                reread = index.refresh()
+                print(f"Manifest index: {len(index.files)} files, {reread} re-read on the new head")
+            return update()
+
+        # Push changes only if the tag was updated
+        try:
+            pushed = commitAndPushChanges(self.token, self.owner, repo, branch,
+                                          commit_message or f"Updated tag to {new_tag}", reapply, self.max_attempts)
+            # Record the new tags only once they are on the remote; after a failed push the
+            # next sync resets the clone and the index still matches the commit it indexed
+            if pushed and index is not None:
+                index.refresh()
+            return pushed
+        finally:
+            # commitAndPushChanges changes into the clone; the next repo is cloned next to this one
+            os.chdir(workdir)
+
+
+def build_parser(repo, branch, strategy, description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("new_tag", nargs="?", help="New released tag, e.g. v18.0.0")
+    parser.add_argument("target_repos", nargs="?", help="Comma-separated services to update")
+    parser.add_argument("token", nargs="?", help="GitHub token for private repository")
+    parser.add_argument("--repo", default=repo, help=f"GitOps repository to update (default: {repo})")
+    parser.add_argument("--branch", default=branch, help=f"Branch to push to (default: {branch})")
+    parser.add_argument("--owner", default=OWNER)
+    parser.add_argument("--strategy", choices=STRATEGIES, default=strategy,
+                        help=f"How image tags are matched in the manifests (default: {strategy})")
+    parser.add_argument("--manifest", metavar="FILE",
+                        help="JSON/YAML release manifest of service -> tag, optionally per target repo; "
+                             "the only positional argument is then the token")
+    parser.add_argument("--no-checkout", action="store_true",
+                        help="Commit the tag changes with git plumbing in the bare mirror, without a working tree")
+    parser.add_argument("--no-index", action="store_true", help="Walk the whole services/ tree instead of using the index")
+    parser.add_argument("--check-visibility", action="store_true",
+                        help="Ask the GitHub API whether the repository is private before putting the token in the URL")
+    parser.add_argument("--max-attempts", type=int, default=5,
+                        help="Pushes to try when concurrent deployments move the branch first")
+    parser.add_argument("--where", metavar="SERVICE",
+                        help="Print the manifest locations and current tags of a service from the index and exit")
+    parser.add_argument("--workers", type=int, help="Manifests read and rewritten in parallel (default: CPU count + 4)")
+    parser.add_argument("--processes", action="store_true",
+                        help="Rewrite on a process pool instead of threads, for trees with many thousands of files")
+    parser.add_argument("--patch", action="store_true",
+                        help="Patch the tag bytes of each manifest through mmap instead of rewriting whole files")
+    return parser
+
+
+# Command line shared by production_deployment_all.py, production_deployment.py and CD.py;
+# each passes its own default repo, branch and strategy. Returns the exit code.
+def main(argv=None, repo="argocd-prod", branch="main", strategy="generic",
+         description="Update image tags of the given services in a GitOps repo"):
+    parser = build_parser(repo, branch, strategy, description)
+    args = parser.parse_args(argv)
+
+    if args.where:
+        return 0 if where(args.repo, args.where) else 1
+
+    new_tag, target_repos, token = args.new_tag, args.target_repos, args.token
+    # With a release manifest the tags come from the file and the single positional is the token
+    if args.manifest and target_repos is None and token is None:
+        new_tag, token = None, args.new_tag
+
+    deployment = Deployment(token, args.repo, args.branch, args.owner, args.strategy, args.no_checkout,
+                            not args.no_index, args.workers, args.processes, args.patch, args.max_attempts,
+                            args.check_visibility)
+
+    if args.manifest:
+        from release_manifest import ReleaseManifestError, describe, load_release_manifest
+
+        if not token:
+            parser.error("token is required")
+        if args.strategy != "generic":
+            parser.error("--manifest needs the generic strategy")
+        try:
+            releases = load_release_manifest(args.manifest, args.repo, args.branch)
+        except (OSError, ReleaseManifestError) as e:
+            print(f"Invalid release manifest: {e}")
+            return 1
+
+        # One scan and one commit/push per target repo for the whole release train, each on its own branch
+        for target_repo, release in releases.items():
+            tags = release["tags"]
+            print(f"\n=== {target_repo} ({release['branch']}): {len(tags)} services ===")
+            deployment.deploy(None, "", tags, f"Updated tags: {describe(tags)}", target_repo, release["branch"])
+        return 0
+
+    if not new_tag or not target_repos or not token:
+        parser.error("new_tag, target_repos and token are required")
+
+    if not re.match(r"^v\d+\.\d+\.\d+$", new_tag):
+        print("Invalid tag format. Use the format vX.Y.Z (e.g., v18.0.0).")
+        return 0
+
+    # Failures are reported in the output; the Jenkins stage reads it and keeps going
+    deployment.deploy(new_tag, target_repos)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
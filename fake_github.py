@@ -0,0 +1,786 @@
+import argparse
+import hashlib
+import io
+import json
+import random
+import re
+import sys
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+DEFAULT_PORT = 8790
+DEFAULT_WORKFLOW = "production-release.yml"
+
+
+def commit_sha(repo, index):
+    return hashlib.sha1(f"{repo}:{index}".encode("utf-8")).hexdigest()
+
+
+def timestamp(seconds):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(seconds))
+
+
+# One repository: a linear history on which every branch and tag points at a commit.
+# A commit gets a new tree when it changes a line; a fixture commit can name its "tree"
+# to share one with another commit, e.g. the second half of a revert pair
+class FakeRepo:
+    def __init__(self, full_name, spec):
+        self.full_name = full_name
+        self.private = spec.get("private", True)
+        self.default_branch = spec.get("default_branch", "main")
+        self.commits = []
+        tree = None
+        for index, commit in enumerate(spec.get("commits") or [{"message": "Initial commit"}]):
+            files = commit.get("files") or [{"filename": f"src/file{index}.py", "additions": 3, "deletions": 1}]
+            if "tree" in commit:
+                tree = commit["tree"]
+            elif tree is None or any(f.get("additions", 0) or f.get("deletions", 0) for f in files):
+                tree = index
+            self.commits.append({
+                "sha": commit.get("sha") or commit_sha(full_name, index),
+                "tree": commit_sha(full_name, f"tree:{tree}"),
+                "message": commit.get("message", f"Commit {index}"),
+                "author": commit.get("author", "dev"),
+                "files": files,
+            })
+        head = len(self.commits) - 1
+        self.branches = {name: self.position(at) for name, at in (spec.get("branches") or {}).items()}
+        self.branches.setdefault(self.default_branch, head)
+        self.tags = {name: self.position(at) for name, at in (spec.get("tags") or {}).items()}
+        self.releases = {}
+        for tag in spec.get("releases") or []:
+            self.add_release(tag, tag, f"Release {tag}")
+        self.runs = []
+
+    # Commit index from a fixture value: an index, a sha, or a branch name
+    def position(self, at):
+        if isinstance(at, int):
+            return at
+        index = self.resolve(at)
+        if index is None:
+            raise ValueError(f"{self.full_name}: unknown commit '{at}'")
+        return index
+
+    # Commit index of a branch, tag, fully qualified ref or sha; None when unknown
+    def resolve(self, ref):
+        ref = ref or ""
+        for prefix, table in (("refs/heads/", self.branches), ("heads/", self.branches),
+                              ("refs/tags/", self.tags), ("tags/", self.tags)):
+            if ref.startswith(prefix):
+                return table.get(ref[len(prefix):])
+        if ref in self.branches:
+            return self.branches[ref]
+        if ref in self.tags:
+            return self.tags[ref]
+        for index, commit in enumerate(self.commits):
+            if len(ref) >= 7 and commit["sha"].startswith(ref):
+                return index
+        return None
+
+    def add_release(self, tag, name, body):
+        release = {
+            "id": len(self.releases) + 1, "tag_name": tag, "name": name, "body": body, "draft": False,
+            "prerelease": False, "created_at": timestamp(time.time()),
+            "html_url": f"https://github.com/{self.full_name}/releases/tag/{tag}",
+        }
+        self.releases[tag] = release
+        return release
+
+    # Commits reachable from head but not from base, oldest first
+    def compare(self, base, head):
+        base_index, head_index = self.resolve(base), self.resolve(head)
+        if base_index is None or head_index is None:
+            return None
+        return self.commits[base_index + 1:head_index + 1] if head_index > base_index else []
+
+    # Tags newest commit first, then by name, as GitHub's tag listing and TAG_COMMIT_DATE order give them
+    def sorted_tags(self):
+        return sorted(self.tags.items(), key=lambda item: (-item[1], item[0]))
+
+
+# Fixed-window request quota for one rate-limit resource, with GitHub's X-RateLimit headers
+class RateLimit:
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.used = 0
+        self.reset = time.time() + window
+
+    def refill(self):
+        if time.time() >= self.reset:
+            self.used = 0
+            self.reset = time.time() + self.window
+
+    def headers(self, resource):
+        return {
+            "X-RateLimit-Limit": str(self.limit), "X-RateLimit-Remaining": str(max(self.limit - self.used, 0)),
+            "X-RateLimit-Reset": str(int(self.reset)), "X-RateLimit-Used": str(self.used),
+            "X-RateLimit-Resource": resource,
+        }
+
+
+# In-memory stand-in for the parts of api.github.com the release flow uses, seeded
+# from a fixture. Every request can be slowed down (latency), failed with a 5xx
+# (error_rate) and counted against a rate-limit quota that answers 403 once spent.
+#
+# Releases created through the API start a workflow run for the tag, which reports
+# in_progress for run_duration seconds and then completed, with the fixture's
+# artifacts attached, so the watcher and artifact reader can follow a release too.
+class FakeGitHub:
+    def __init__(self, fixture, host="127.0.0.1", port=DEFAULT_PORT, latency=0.0, jitter=0.0, error_rate=0.0,
+                 error_status=502, rate_limit=5000, rate_window=3600, graphql_limit=5000, run_duration=5.0,
+                 run_failure_rate=0.0, tokens=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.run_duration = run_duration
+        self.run_failure_rate = run_failure_rate
+        self.tokens = set(tokens or [])
+        self.random = random.Random(seed)
+        # Reentrant: handlers run under the lock and count their own response
+        self.lock = threading.RLock()
+        self.limits = {"core": RateLimit(rate_limit, rate_window), "graphql": RateLimit(graphql_limit, rate_window)}
+        self.stats = {"requests": 0, "routes": {}, "statuses": {}, "injected_errors": 0, "rate_limited": 0,
+                      "in_flight": 0, "max_in_flight": 0}
+
+        self.owners = set()
+        self.repos = {}
+        self.run_ids = 0
+        self.artifacts = {}
+        self.load(fixture)
+
+        self.server = ThreadingHTTPServer((host, port), FakeGitHubHandler)
+        self.server.github = self
+        self.thread = None
+
+    @property
+    def address(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def load(self, fixture):
+        self.workflow = fixture.get("workflow", DEFAULT_WORKFLOW)
+        self.release_artifacts = fixture.get("release_artifacts") or {}
+        for full_name, spec in (fixture.get("repos") or {}).items():
+            repo = FakeRepo(full_name, spec)
+            self.repos[full_name.lower()] = repo
+            self.owners.add(full_name.split("/")[0].lower())
+            for run in spec.get("runs") or []:
+                self.add_run(repo, run.get("workflow", self.workflow), run["head_branch"], run.get("status", "completed"),
+                             run.get("conclusion", "success"), run.get("artifacts"))
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        print(f"Fake GitHub API with {len(self.repos)} repositories on {self.address}")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def snapshot(self):
+        with self.lock:
+            stats = json.loads(json.dumps(self.stats))
+            stats["rate_limit"] = {name: limit.headers(name) for name, limit in self.limits.items()}
+            stats["releases"] = sum(len(repo.releases) for repo in self.repos.values())
+            return stats
+
+    # Add a workflow run; started runs finish run_duration seconds after `started`
+    def add_run(self, repo, workflow, head_branch, status="in_progress", conclusion=None, artifacts=None,
+                started=None):
+        self.run_ids += 1
+        index = repo.resolve(head_branch)
+        run = {
+            "id": self.run_ids, "run_number": len(repo.runs) + 1, "name": workflow.rsplit(".", 1)[0],
+            "path": f".github/workflows/{workflow}", "head_branch": head_branch, "event": "push",
+            "head_sha": repo.commits[index]["sha"] if index is not None else None,
+            "status": status, "conclusion": conclusion,
+            "html_url": f"https://github.com/{repo.full_name}/actions/runs/{self.run_ids}",
+            "created_at": timestamp(started or time.time()), "started": started,
+            "artifacts": [],
+        }
+        for name, files in (artifacts or {}).items():
+            artifact_id = len(self.artifacts) + 1
+            self.artifacts[artifact_id] = {"id": artifact_id, "name": name, "files": files, "repo": repo.full_name}
+            run["artifacts"].append(artifact_id)
+        repo.runs.append(run)
+        return run
+
+    # Public view of a run, moving started runs along as time passes
+    def run_view(self, run):
+        if run["started"] is not None and run["status"] != "completed":
+            if time.time() - run["started"] >= self.run_duration:
+                run["status"] = "completed"
+                run["conclusion"] = "failure" if self.random.random() < self.run_failure_rate else "success"
+        return {key: value for key, value in run.items() if key not in ("started", "artifacts")}
+
+    # Simulated network and quota effects; returns a (status, payload, headers) to send instead, or None
+    def inject(self, resource):
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        with self.lock:
+            limit = self.limits[resource]
+            limit.refill()
+            if limit.used >= limit.limit:
+                self.stats["rate_limited"] += 1
+                message = "API rate limit exceeded for user. (But here's the good news: this is a fake server.)"
+                return 403, {"message": message, "documentation_url": "https://docs.github.com/rest/rate-limit"}, \
+                    limit.headers(resource)
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.stats["injected_errors"] += 1
+                return self.error_status, {"message": "Server Error"}, {}
+        return None
+
+    def count(self, route, status, resource, charged):
+        with self.lock:
+            if route is None:
+                return {}
+            self.stats["requests"] += 1
+            self.stats["routes"][route] = self.stats["routes"].get(route, 0) + 1
+            self.stats["statuses"][str(status)] = self.stats["statuses"].get(str(status), 0) + 1
+            if charged:
+                self.limits[resource].used += 1
+            return self.limits[resource].headers(resource)
+
+    def enter(self):
+        with self.lock:
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+    def leave(self):
+        with self.lock:
+            self.stats["in_flight"] -= 1
+
+
+# Routes as (method, path pattern, handler method, stats name)
+ROUTES = [
+    ("GET", r"/repos/([^/]+)/([^/]+)", "get_repo", "repo"),
+    ("GET", r"/repos/([^/]+)/([^/]+)/commits/(.+)", "get_commit", "commit"),
+    ("GET", r"/repos/([^/]+)/([^/]+)/compare/(.+?)\.\.\.(.+)", "get_compare", "compare"),
+    ("GET", r"/repos/([^/]+)/([^/]+)/tags", "get_tags", "tags"),
+    ("GET", r"/repos/([^/]+)/([^/]+)/releases", "get_releases", "releases"),
+    ("POST", r"/repos/([^/]+)/([^/]+)/releases", "post_release", "create_release"),
+    ("GET", r"/repos/([^/]+)/([^/]+)/releases/latest", "get_latest_release", "release"),
+    ("GET", r"/repos/([^/]+)/([^/]+)/releases/tags/(.+)", "get_release_by_tag", "release"),
+    ("GET", r"/repos/([^/]+)/([^/]+)/git/commits/([0-9a-f]{40})", "get_git_commit", "git_commit"),
+    ("GET", r"/repos/([^/]+)/([^/]+)/git/ref/(.+)", "get_ref", "git_ref"),
+    ("GET", r"/repos/([^/]+)/([^/]+)/git/refs(?:/(.+))?", "get_refs", "git_refs"),
+    ("GET", r"/repos/([^/]+)/([^/]+)/git/matching-refs/(.*)", "get_matching_refs", "git_matching_refs"),
+    ("POST", r"/repos/([^/]+)/([^/]+)/git/refs", "post_ref", "create_ref"),
+    ("PATCH", r"/repos/([^/]+)/([^/]+)/git/refs/(.+)", "patch_ref", "update_ref"),
+    ("GET", r"/repos/([^/]+)/([^/]+)/actions/workflows/([^/]+)/runs", "get_workflow_runs", "workflow_runs"),
+    ("GET", r"/repos/([^/]+)/([^/]+)/actions/runs/(\d+)", "get_run", "run"),
+    ("GET", r"/repos/([^/]+)/([^/]+)/actions/runs/(\d+)/artifacts", "get_run_artifacts", "run_artifacts"),
+    ("GET", r"/repos/([^/]+)/([^/]+)/actions/artifacts/(\d+)/zip", "get_artifact_zip", "artifact_zip"),
+    ("POST", r"/graphql", "post_graphql", "graphql"),
+    ("GET", r"/_fake/stats", "get_stats", None),
+    ("GET", r"/([^/]+)", "get_owner", "owner"),
+]
+ROUTES = [(method, re.compile(pattern + r"/?$"), handler, name) for method, pattern, handler, name in ROUTES]
+
+# Aliased repository lookups as built by graphql_batch.build_query
+GRAPHQL_REPOSITORY = re.compile(r'(\w+): repository\(owner: ("(?:[^"\\]|\\.)*"), name: ("(?:[^"\\]|\\.)*")\)')
+GRAPHQL_TAG_COUNT = re.compile(r'refs\(refPrefix: "refs/tags/", first: (\d+)')
+GRAPHQL_HEAD_REF = re.compile(r'ref\(qualifiedName: ("(?:[^"\\]|\\.)*")\)')
+
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so pooled clients reuse connections as they do with api.github.com
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_PATCH(self):
+        self.dispatch("PATCH")
+
+    def send(self, status, payload=None, headers=None, content_type="application/json"):
+        if isinstance(payload, bytes):
+            body = payload
+        elif payload is None:
+            body = b""
+        else:
+            body = json.dumps(payload).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+
+        # Conditional GETs: an unchanged JSON body is answered with 304 and no quota is used
+        etag = None
+        if self.command == "GET" and status == 200 and content_type.startswith("application/json"):
+            etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+            if self.headers.get("If-None-Match") == etag:
+                status, body = 304, b""
+
+        github = self.server.github
+        rate_headers = github.count(self.route_name, status, self.resource, self.charged and status != 304)
+        self.send_response(status)
+        for name, value in dict(rate_headers, **(headers or {})).items():
+            self.send_header(name, value)
+        if etag:
+            self.send_header("ETag", etag)
+        if status != 304:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def not_found(self):
+        self.send(404, {"message": "Not Found", "documentation_url": "https://docs.github.com/rest"})
+
+    def dispatch(self, method):
+        github = self.server.github
+        parts = urlsplit(self.path)
+        self.query = parse_qs(parts.query)
+        length = int(self.headers.get("Content-Length") or 0)
+        self.body = self.rfile.read(length) if length else b""
+
+        self.route_name = None
+        self.charged = True
+        self.resource = "graphql" if parts.path.rstrip("/") == "/graphql" else "core"
+        for route_method, pattern, handler, name in ROUTES:
+            match = pattern.match(parts.path)
+            if match and route_method == method:
+                break
+        else:
+            self.route_name = f"{method} unknown"
+            self.not_found()
+            return
+
+        self.route_name = name
+        if name is None:
+            self.send(200, github.snapshot())
+            return
+
+        token = (self.headers.get("Authorization") or "").split(" ", 1)[-1]
+        if github.tokens and token not in github.tokens:
+            self.send(401, {"message": "Bad credentials", "documentation_url": "https://docs.github.com/rest"})
+            return
+
+        github.enter()
+        try:
+            injected = github.inject(self.resource)
+            if injected is not None:
+                # A request refused for rate limiting does not use quota itself
+                self.charged = injected[0] != 403
+                self.send(*injected)
+                return
+            args = [unquote(group) if group is not None else None for group in match.groups()]
+            with github.lock:
+                getattr(self, handler)(*args)
+        finally:
+            github.leave()
+
+    def repo(self, owner, name):
+        repo = self.server.github.repos.get(f"{owner}/{name}".lower())
+        if repo is None:
+            self.not_found()
+        return repo
+
+    # Slice a list by the per_page/page query parameters and add GitHub's Link header
+    def send_page(self, items, wrap=None):
+        per_page = min(int(self.query.get("per_page", ["30"])[0]), 100)
+        page = int(self.query.get("page", ["1"])[0])
+        chunk = items[(page - 1) * per_page:page * per_page]
+        headers = {}
+        if page * per_page < len(items):
+            query = dict((key, values[0]) for key, values in self.query.items())
+            query["page"] = str(page + 1)
+            path = urlsplit(self.path).path
+            next_url = f"http://{self.headers.get('Host')}{path}?" + "&".join(f"{k}={v}" for k, v in query.items())
+            headers["Link"] = f'<{next_url}>; rel="next"'
+        self.send(200, wrap(chunk, len(items)) if wrap else chunk, headers)
+
+    def get_owner(self, owner):
+        if owner.lower() not in self.server.github.owners:
+            self.not_found()
+            return
+        self.send(200, {"login": owner, "type": "Organization"})
+
+    def get_repo(self, owner, name):
+        repo = self.repo(owner, name)
+        if repo:
+            self.send(200, {"name": name, "full_name": repo.full_name, "private": repo.private,
+                            "default_branch": repo.default_branch})
+
+    def get_commit(self, owner, name, ref):
+        repo = self.repo(owner, name)
+        if not repo:
+            return
+        index = repo.resolve(ref)
+        if index is None:
+            self.send(422, {"message": f"No commit found for SHA: {ref}"})
+            return
+        commit = repo.commits[index]
+        if "application/vnd.github.sha" in (self.headers.get("Accept") or ""):
+            self.send(200, commit["sha"].encode(), content_type="application/vnd.github.sha")
+            return
+        self.send(200, {"sha": commit["sha"], "commit": {"message": commit["message"],
+                                                        "author": {"name": commit["author"]}}})
+
+    def get_git_commit(self, owner, name, sha):
+        repo = self.repo(owner, name)
+        if not repo:
+            return
+        index = repo.resolve(sha)
+        if index is None or repo.commits[index]["sha"] != sha:
+            self.not_found()
+            return
+        commit = repo.commits[index]
+        self.send(200, {"sha": sha, "tree": {"sha": commit["tree"]}, "message": commit["message"],
+                        "author": {"name": commit["author"]},
+                        "parents": [{"sha": repo.commits[index - 1]["sha"]}] if index else []})
+
+    def get_compare(self, owner, name, base, head):
+        repo = self.repo(owner, name)
+        if not repo:
+            return
+        commits = repo.compare(base, head)
+        if commits is None:
+            self.not_found()
+            return
+        files = {}
+        for commit in commits:
+            for changed in commit["files"]:
+                entry = files.setdefault(changed["filename"], {"filename": changed["filename"], "additions": 0,
+                                                               "deletions": 0, "changes": 0, "patch": ""})
+                entry["additions"] += changed.get("additions", 0)
+                entry["deletions"] += changed.get("deletions", 0)
+                entry["changes"] = entry["additions"] + entry["deletions"]
+                entry["patch"] += "@@ -1 +1 @@\n" + "+line\n" * changed.get("additions", 0)
+        self.send(200, {
+            "html_url": f"https://github.com/{repo.full_name}/compare/{base}...{head}",
+            "status": "ahead" if commits else "identical", "ahead_by": len(commits), "total_commits": len(commits),
+            "commits": [{"sha": commit["sha"], "commit": {"message": commit["message"],
+                                                         "author": {"name": commit["author"]}}} for commit in commits],
+            "files": list(files.values()),
+        })
+
+    def get_tags(self, owner, name):
+        repo = self.repo(owner, name)
+        if repo:
+            self.send_page([{"name": tag, "commit": {"sha": repo.commits[index]["sha"]}}
+                            for tag, index in repo.sorted_tags()])
+
+    def get_releases(self, owner, name):
+        repo = self.repo(owner, name)
+        if repo:
+            self.send_page(sorted(repo.releases.values(), key=lambda release: -release["id"]))
+
+    def get_latest_release(self, owner, name):
+        repo = self.repo(owner, name)
+        if not repo:
+            return
+        if not repo.releases:
+            self.not_found()
+            return
+        self.send(200, max(repo.releases.values(), key=lambda release: release["id"]))
+
+    def get_release_by_tag(self, owner, name, tag):
+        repo = self.repo(owner, name)
+        if not repo:
+            return
+        if tag not in repo.releases:
+            self.not_found()
+            return
+        self.send(200, repo.releases[tag])
+
+    # Creating a release also creates its tag at target_commitish and starts the release workflow
+    def post_release(self, owner, name):
+        github = self.server.github
+        repo = self.repo(owner, name)
+        if not repo:
+            return
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError:
+            self.send(400, {"message": "Problems parsing JSON"})
+            return
+        tag = data.get("tag_name")
+        if not tag:
+            self.send(422, {"message": "Validation Failed", "errors": [{"field": "tag_name", "code": "missing_field"}]})
+            return
+        if tag in repo.releases:
+            self.send(422, {"message": "Validation Failed",
+                            "errors": [{"resource": "Release", "code": "already_exists", "field": "tag_name"}]})
+            return
+        if tag not in repo.tags:
+            index = repo.resolve(data.get("target_commitish") or repo.default_branch)
+            if index is None:
+                self.send(422, {"message": "Validation Failed",
+                                "errors": [{"field": "target_commitish", "code": "invalid"}]})
+                return
+            repo.tags[tag] = index
+        release = repo.add_release(tag, data.get("name") or tag, data.get("body") or "")
+        github.add_run(repo, github.workflow, tag, artifacts=github.release_artifacts, started=time.time())
+        self.send(201, release)
+
+    def ref_entry(self, repo, ref, index):
+        return {"ref": ref, "object": {"sha": repo.commits[index]["sha"], "type": "commit"}}
+
+    def all_refs(self, repo):
+        refs = [(f"refs/heads/{name}", index) for name, index in repo.branches.items()]
+        refs += [(f"refs/tags/{name}", index) for name, index in repo.tags.items()]
+        return sorted(refs)
+
+    def get_ref(self, owner, name, ref):
+        repo = self.repo(owner, name)
+        if not repo:
+            return
+        qualified = f"refs/{ref}"
+        for candidate, index in self.all_refs(repo):
+            if candidate == qualified:
+                self.send(200, self.ref_entry(repo, candidate, index))
+                return
+        self.not_found()
+
+    def get_refs(self, owner, name, ref=None):
+        repo = self.repo(owner, name)
+        if not repo:
+            return
+        prefix = f"refs/{ref}" if ref else "refs/"
+        refs = [self.ref_entry(repo, candidate, index) for candidate, index in self.all_refs(repo)
+                if candidate.startswith(prefix)]
+        exact = [entry for entry in refs if entry["ref"] == prefix]
+        if exact:
+            self.send(200, exact[0])
+        elif refs:
+            self.send_page(refs)
+        else:
+            self.not_found()
+
+    def get_matching_refs(self, owner, name, ref):
+        repo = self.repo(owner, name)
+        if repo:
+            self.send_page([self.ref_entry(repo, candidate, index) for candidate, index in self.all_refs(repo)
+                            if candidate.startswith(f"refs/{ref}")])
+
+    def post_ref(self, owner, name):
+        repo = self.repo(owner, name)
+        if not repo:
+            return
+        data = json.loads(self.body or b"{}")
+        ref, index = data.get("ref", ""), repo.resolve(data.get("sha", ""))
+        if index is None or not ref.startswith(("refs/heads/", "refs/tags/")):
+            self.send(422, {"message": "Object does not exist" if index is None else "Reference name is invalid"})
+            return
+        table = repo.branches if ref.startswith("refs/heads/") else repo.tags
+        short = ref.split("/", 2)[2]
+        if short in table:
+            self.send(422, {"message": "Reference already exists"})
+            return
+        table[short] = index
+        self.send(201, self.ref_entry(repo, ref, index))
+
+    def patch_ref(self, owner, name, ref):
+        repo = self.repo(owner, name)
+        if not repo:
+            return
+        data = json.loads(self.body or b"{}")
+        kind, _, short = ref.partition("/")
+        table = {"heads": repo.branches, "tags": repo.tags}.get(kind)
+        index = repo.resolve(data.get("sha", ""))
+        if table is None or short not in table:
+            self.send(422, {"message": "Reference does not exist"})
+            return
+        if index is None:
+            self.send(422, {"message": "Object does not exist"})
+            return
+        if index < table[short] and not data.get("force"):
+            self.send(422, {"message": "Update is not a fast forward"})
+            return
+        table[short] = index
+        self.send(200, self.ref_entry(repo, f"refs/{ref}", index))
+
+    def get_workflow_runs(self, owner, name, workflow):
+        github = self.server.github
+        repo = self.repo(owner, name)
+        if not repo:
+            return
+        # GitHub filters on `branch` (the tag name for tag pushes) and ignores unknown parameters such as `ref`
+        ref = (self.query.get("branch") or [None])[0]
+        status = (self.query.get("status") or [None])[0]
+        runs = []
+        for run in reversed(repo.runs):
+            view = github.run_view(run)
+            if not view["path"].endswith(f"/{workflow}") or (ref and view["head_branch"] != ref):
+                continue
+            if status and status not in (view["status"], view["conclusion"]):
+                continue
+            runs.append(view)
+        self.send_page(runs, lambda chunk, total: {"total_count": total, "workflow_runs": chunk})
+
+    def find_run(self, repo, run_id):
+        for run in repo.runs:
+            if run["id"] == int(run_id):
+                return run
+        return None
+
+    def get_run(self, owner, name, run_id):
+        repo = self.repo(owner, name)
+        if not repo:
+            return
+        run = self.find_run(repo, run_id)
+        if run is None:
+            self.not_found()
+            return
+        self.send(200, self.server.github.run_view(run))
+
+    def get_run_artifacts(self, owner, name, run_id):
+        github = self.server.github
+        repo = self.repo(owner, name)
+        if not repo:
+            return
+        run = self.find_run(repo, run_id)
+        if run is None:
+            self.not_found()
+            return
+        wanted = (self.query.get("name") or [None])[0]
+        artifacts = []
+        for artifact_id in run["artifacts"]:
+            artifact = github.artifacts[artifact_id]
+            if wanted and artifact["name"] != wanted:
+                continue
+            artifacts.append({
+                "id": artifact_id, "name": artifact["name"], "expired": False,
+                "size_in_bytes": sum(len(content) for content in artifact["files"].values()),
+                "archive_download_url": f"http://{self.headers.get('Host')}/repos/{repo.full_name}/actions/artifacts/{artifact_id}/zip",
+            })
+        self.send_page(artifacts, lambda chunk, total: {"total_count": total, "artifacts": chunk})
+
+    def get_artifact_zip(self, owner, name, artifact_id):
+        artifact = self.server.github.artifacts.get(int(artifact_id))
+        if artifact is None or artifact["repo"].lower() != f"{owner}/{name}".lower():
+            self.not_found()
+            return
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+            for file_name, content in artifact["files"].items():
+                zf.writestr(file_name, content)
+        self.send(200, archive.getvalue(), content_type="application/zip")
+
+    # Answers the two query shapes in graphql_batch.py: aliased repository lookups of
+    # tags and a branch head, and the ref compare query
+    def post_graphql(self):
+        try:
+            payload = json.loads(self.body or b"{}")
+        except ValueError:
+            self.send(400, {"message": "Problems parsing JSON"})
+            return
+        query, variables = payload.get("query") or "", payload.get("variables") or {}
+
+        if "compare(headRef:" in query:
+            repo = self.server.github.repos.get(f"{variables.get('owner')}/{variables.get('repo')}".lower())
+            if repo is None:
+                self.send(200, {"data": {"repository": None}, "errors": [{"type": "NOT_FOUND", "message": "Could not resolve to a Repository"}]})
+                return
+            commits = repo.compare(variables.get("baseRef"), variables.get("headRef"))
+            ref = None
+            if commits is not None:
+                nodes = [{"message": commit["message"], "author": {"name": commit["author"]}}
+                         for commit in commits[:int(variables.get("commitCount", 100))]]
+                ref = {"compare": {"aheadBy": len(commits), "commits": {"nodes": nodes}}}
+            self.send(200, {"data": {"repository": {"ref": ref}}})
+            return
+
+        lookups = GRAPHQL_REPOSITORY.findall(query)
+        if not lookups:
+            self.send(200, {"errors": [{"message": "This fake server only answers the queries in graphql_batch.py"}]})
+            return
+        tag_count = GRAPHQL_TAG_COUNT.search(query)
+        head_ref = GRAPHQL_HEAD_REF.search(query)
+        data, errors = {}, []
+        for alias, owner, name in lookups:
+            full_name = f"{json.loads(owner)}/{json.loads(name)}"
+            repo = self.server.github.repos.get(full_name.lower())
+            if repo is None:
+                data[alias] = None
+                errors.append({"type": "NOT_FOUND", "path": [alias],
+                               "message": f"Could not resolve to a Repository with the name '{full_name}'."})
+                continue
+            tags = repo.sorted_tags()[:int(tag_count.group(1)) if tag_count else 100]
+            head = repo.resolve(json.loads(head_ref.group(1))) if head_ref else None
+            data[alias] = {
+                "tags": {"nodes": [{"name": tag, "target": {"oid": repo.commits[index]["sha"],
+                                                            "tree": {"oid": repo.commits[index]["tree"]}}}
+                                   for tag, index in tags]},
+                "head": {"target": {"oid": repo.commits[head]["sha"], "tree": {"oid": repo.commits[head]["tree"]}}}
+                if head is not None else None,
+            }
+        self.send(200, dict({"data": data}, **({"errors": errors} if errors else {})))
+
+    def get_stats(self):
+        self.send(200, self.server.github.snapshot())
+
+
+# Fixture with `count` repositories for release load tests. Each has `tags` releases on
+# consecutive commits of develop; the first `changed` repos also have `ahead` unreleased commits.
+def synthetic_fixture(count, changed=None, tags=30, ahead=3, owner="gripinvest", branch="develop"):
+    changed = count if changed is None else changed
+    repos = {}
+    for i in range(count):
+        commit_count = tags + (ahead if i < changed else 0)
+        commits = [{"message": f"Change {n} in service {i}", "author": f"dev{n % 5}",
+                    "files": [{"filename": f"src/module{n % 7}.py", "additions": 5, "deletions": 2}]}
+                   for n in range(commit_count)]
+        repos[f"{owner}/gi-service-{i}"] = {
+            "default_branch": branch, "branches": {branch: commit_count - 1, "main": tags - 1},
+            "commits": commits, "tags": {f"v1.{n}.0": n for n in range(tags)},
+            "releases": [f"v1.{n}.0" for n in range(tags)],
+        }
+    return {"workflow": DEFAULT_WORKFLOW, "repos": repos,
+            "release_artifacts": {"Success-Service": {"success-service.txt": "\n".join(sorted(repos)) + "\n"}}}
+
+
+def load_fixture(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake GitHub API for load-testing the release flow")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--fixture", help="JSON fixture of repositories, tags, releases and workflow runs")
+    source.add_argument("--repos", type=int, default=50, help="Generate this many repositories instead")
+    parser.add_argument("--changed", type=int, help="Generated repositories with unreleased commits (default: all)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra random seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with a 5xx")
+    parser.add_argument("--error-status", type=int, default=502)
+    parser.add_argument("--rate-limit", type=int, default=5000, help="Core requests per --rate-window")
+    parser.add_argument("--graphql-limit", type=int, default=5000, help="GraphQL requests per --rate-window")
+    parser.add_argument("--rate-window", type=float, default=3600, help="Seconds until the quota resets")
+    parser.add_argument("--run-duration", type=float, default=5.0, help="Seconds a release's workflow run takes")
+    parser.add_argument("--run-failure-rate", type=float, default=0.0)
+    parser.add_argument("--token", action="append", help="Accepted token (default: any token)")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    fixture = load_fixture(args.fixture) if args.fixture else synthetic_fixture(args.repos, args.changed)
+    github = FakeGitHub(fixture, args.host, args.port, args.latency, args.jitter, args.error_rate, args.error_status,
+                        args.rate_limit, args.rate_window, args.graphql_limit, args.run_duration,
+                        args.run_failure_rate, args.token, args.seed).start()
+    print(f"Point the scripts at it with GITHUB_API_URL={github.address}; request counts at {github.address}/_fake/stats")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        github.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import argparse
+import io
+import json
+import sys
+import zipfile
+
+from github_client import get_client
+
+DEFAULT_REPO = "gripinvest/gi-sirius"
+DEFAULT_WORKFLOW = "production-release.yml"
+DEFAULT_ARTIFACT = "Success-Service"
+DEFAULT_FILE = "success-service.txt"
+
+
+# Successful run of the workflow for the exact release tag, optionally the latest successful run instead.
+# For a tag push the run's head_branch is the tag name, which is what `branch` filters on
+def find_run(client, repo, workflow, tag, fallback_latest=False):
+    url = f"https://api.github.com/repos/{repo}/actions/workflows/{workflow}/runs?status=success&per_page=1"
+    run = first_run(client, f"{url}&branch={tag}", tag)
+    if run is None and fallback_latest:
+        print(f"No successful run for tag '{tag}' in {repo}, using the latest successful run")
+        run = first_run(client, url)
+    return run
+
+
+# First run of a listing; with head_branch, only a run of that branch or tag is accepted
+def first_run(client, url, head_branch=None):
+    response = client.get(url, name="artifact_run")
+    if response.status_code != 200:
+        return None
+    runs = response.json().get("workflow_runs") or []
+    if not runs or (head_branch is not None and runs[0].get("head_branch") != head_branch):
+        return None
+    return runs[0]
+
+
+def find_artifact(client, repo, run_id, artifact_name):
+    url = f"https://api.github.com/repos/{repo}/actions/runs/{run_id}/artifacts?name={artifact_name}"
+    response = client.get(url, name="artifact_list")
+    if response.status_code != 200:
+        return None
+    for artifact in response.json().get("artifacts", []):
+        if artifact.get("name") == artifact_name and not artifact.get("expired"):
+            return artifact
+    return None
+
+
+# Stream the artifact zip into memory and read one member from it, without touching the disk
+def read_artifact_file(client, artifact, file_name, chunk_size=64 * 1024):
+    response = client.get(artifact["archive_download_url"], stream=True, name="artifact_download")
+    if response.status_code != 200:
+        print(f"Error {response.status_code} downloading artifact '{artifact.get('name')}'")
+        return None
+
+    archive = io.BytesIO()
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        archive.write(chunk)
+    response.close()
+
+    with zipfile.ZipFile(archive) as zf:
+        names = [name for name in zf.namelist() if name.rsplit("/", 1)[-1] == file_name]
+        if not names:
+            print(f"'{file_name}' not found in artifact '{artifact.get('name')}'")
+            return None
+        return zf.read(names[0]).decode("utf-8")
+
+
+# Service names listed in the Success-Service artifact of the release run
+def fetch_success_services(client, tag, repo=DEFAULT_REPO, workflow=DEFAULT_WORKFLOW, artifact_name=DEFAULT_ARTIFACT,
+                           file_name=DEFAULT_FILE, run=None, fallback_latest=False):
+    run = run or find_run(client, repo, workflow, tag, fallback_latest)
+    if run is None:
+        print(f"No successful '{workflow}' run found for {repo}")
+        return None
+    print(f"GitHub Run ID: {run['id']}")
+
+    artifact = find_artifact(client, repo, run["id"], artifact_name)
+    if artifact is None:
+        print(f"Artifact named '{artifact_name}' not found.")
+        return None
+
+    text = read_artifact_file(client, artifact, file_name)
+    if text is None:
+        return None
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def write_services(path, services):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(services, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read the service list from the Success-Service artifact of a release run")
+    parser.add_argument("tag", help="Release tag of the workflow run")
+    parser.add_argument("token", help="GitHub token")
+    parser.add_argument("--repo", default=DEFAULT_REPO)
+    parser.add_argument("--workflow", default=DEFAULT_WORKFLOW)
+    parser.add_argument("--artifact", default=DEFAULT_ARTIFACT)
+    parser.add_argument("--file", default=DEFAULT_FILE)
+    parser.add_argument("--fallback-latest", action="store_true",
+                        help="Use the latest successful run when the tag has no successful run")
+    parser.add_argument("--output", help="Also write the JSON service list to this file")
+    args = parser.parse_args()
+
+    client = get_client(args.token)
+    services = fetch_success_services(client, args.tag, args.repo, args.workflow, args.artifact, args.file,
+                                      fallback_latest=args.fallback_latest)
+    if services is None:
+        return 1
+
+    print(f"Extracted Services: {services}")
+    if args.output:
+        write_services(args.output, services)
+    print(json.dumps(services))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import os
+import shutil
+import stat
+import subprocess
+
+# Bare mirrors live here, one per GitHub repository; GIT_MIRROR_DIR moves them
+DEFAULT_MIRROR_DIR = os.path.join(os.path.expanduser("~"), ".cache", "jenkins-cicd", "mirrors")
+
+# Only the manifests are checked out
+DEFAULT_SPARSE_PATHS = ("services",)
+
+
+def git(*args, cwd=None, capture=False):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=capture, text=True)
+
+
+def mirror_path_for(owner, repo):
+    return os.path.join(os.environ.get("GIT_MIRROR_DIR", DEFAULT_MIRROR_DIR), owner, f"{repo}.git")
+
+
+# Git marks pack files read-only, which shutil.rmtree cannot delete on Windows
+def remove_tree(path):
+    def make_writable(func, target, _):
+        os.chmod(target, stat.S_IWRITE)
+        func(target)
+    shutil.rmtree(path, onerror=make_writable)
+
+
+# Create the bare mirror on first use. It is a partial clone (blobs are fetched
+# only when a checkout needs them) and keeps remote branches under refs/remotes,
+# so a fetch never has to touch the branch checked out in the worktree.
+def ensure_mirror(mirror_path, url):
+    if not os.path.isfile(os.path.join(mirror_path, "HEAD")):
+        os.makedirs(mirror_path, exist_ok=True)
+        git("init", "--bare", "--quiet", mirror_path)
+        git("-C", mirror_path, "config", "remote.origin.fetch", "+refs/heads/*:refs/remotes/origin/*")
+        git("-C", mirror_path, "config", "remote.origin.promisor", "true")
+        git("-C", mirror_path, "config", "remote.origin.partialclonefilter", "blob:none")
+        git("-C", mirror_path, "config", "remote.origin.url", url)
+    else:
+        # The URL carries the token, which may have changed since the last run
+        git("-C", mirror_path, "config", "remote.origin.url", url)
+
+
+# Bring the mirror to the tip of the branch with a single shallow, blobless fetch
+def fetch_branch(mirror_path, branch):
+    git("-C", mirror_path, "fetch", "--quiet", "--depth", "1", "--filter=blob:none", "--prune", "origin",
+        f"+refs/heads/{branch}:refs/remotes/origin/{branch}")
+
+
+def is_worktree(repo_path):
+    return os.path.isfile(os.path.join(repo_path, ".git"))
+
+
+# Check out <branch> of the mirror into repo_path as a sparse worktree holding only
+# sparse_paths. The worktree shares the mirror's object store, so a cold start
+# downloads only the tip commit, its trees and the blobs under services/.
+def add_worktree(mirror_path, repo_path, branch, sparse_paths):
+    git("-C", mirror_path, "worktree", "prune")
+    git("-C", mirror_path, "worktree", "add", "--quiet", "--no-checkout", "--force", "-B", branch, repo_path,
+        f"origin/{branch}")
+    git("-C", repo_path, "sparse-checkout", "set", "--cone", *sparse_paths)
+    git("-C", repo_path, "checkout", "--quiet", "--force", branch)
+
+
+# Prepare an up-to-date sparse checkout of <branch> at repo_path, backed by a
+# persistent bare mirror. A full clone left at repo_path by older versions of the
+# scripts, or a folder that is not a git checkout, is replaced. Local changes in
+# the worktree are discarded: it is reset to the remote tip on every run.
+def sync_checkout(url, owner, repo, repo_path, branch, sparse_paths=DEFAULT_SPARSE_PATHS):
+    mirror_path = mirror_path_for(owner, repo)
+    ensure_mirror(mirror_path, url)
+    fetch_branch(mirror_path, branch)
+
+    if os.path.exists(repo_path) and not is_worktree(repo_path):
+        print(f"Replacing {repo_path} with a sparse checkout of the mirror")
+        remove_tree(repo_path)
+
+    if not os.path.exists(repo_path):
+        add_worktree(mirror_path, repo_path, branch, sparse_paths)
+        print(f"Created sparse checkout of {repo} ({', '.join(sparse_paths)}) on branch {branch}")
+    else:
+        git("-C", repo_path, "checkout", "--quiet", "--force", "-B", branch, f"origin/{branch}")
+        print(f"Reset {repo} to origin/{branch}")
+    return mirror_path
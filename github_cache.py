@@ -0,0 +1,129 @@
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Default location of the on-disk cache, can be moved with GITHUB_HTTP_CACHE
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "jenkins-cicd", "github-http-cache.json")
+
+# Only keep the headers that callers read back from a cached response
+CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Link")
+
+# Small, often repeated GETs worth keeping between runs: the repo, its releases, tags and
+# refs, immutable git commit objects and workflow runs. Compare payloads and other large
+# responses go to the network every time instead of filling the file every process loads
+CACHEABLE_PATHS = re.compile(
+    r"/repos/[^/]+/[^/]+"
+    r"(/releases(/latest|/tags/[^/]+)?|/tags|/git/(ref|refs|matching-refs)(/.*)?|/git/commits/[0-9a-f]{40}"
+    r"|/actions/workflows/[^/]+/runs|/actions/runs/\d+(/artifacts)?)?/?$")
+
+
+def cacheable(url):
+    return bool(CACHEABLE_PATHS.search(urlsplit(url).path))
+
+
+# Persistent ETag/Last-Modified cache for GitHub GET requests. A revalidated
+# entry comes back as 304, which costs no rate-limit quota and no payload.
+class ResponseCache:
+    def __init__(self, path=None, max_bytes=10 * 1024 * 1024, max_entry_bytes=256 * 1024):
+        self.path = path or os.environ.get("GITHUB_HTTP_CACHE") or DEFAULT_CACHE_PATH
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.entries = self.load()
+        self.hits = 0
+        self.misses = 0
+        atexit.register(self.save)
+
+    # Entries outside CACHEABLE_PATHS, e.g. from an older cache file, are dropped
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        kept = {url: entry for url, entry in entries.items() if cacheable(url)}
+        self.dirty = len(kept) != len(entries)
+        return kept
+
+    # Write the cache atomically so a crashed run never leaves a broken file
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            self.evict()
+            data = json.dumps(self.entries)
+            self.dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Warning: Unable to save GitHub cache {self.path}: {e}")
+
+    # Drop least recently used entries until the cache fits in max_bytes
+    def evict(self):
+        total = sum(len(entry["body"]) for entry in self.entries.values())
+        if total <= self.max_bytes:
+            return
+        for url, entry in sorted(self.entries.items(), key=lambda item: item[1]["used"]):
+            total -= len(entry["body"])
+            del self.entries[url]
+            if total <= self.max_bytes:
+                break
+
+    # Validators to send with a GET for this URL
+    def conditional_headers(self, url):
+        with self.lock:
+            entry = self.entries.get(url)
+            if not entry:
+                return {}
+            headers = {}
+            if entry["headers"].get("ETag"):
+                headers["If-None-Match"] = entry["headers"]["ETag"]
+            if entry["headers"].get("Last-Modified"):
+                headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+            return headers
+
+    # Turn a 304 into the cached response, or store a fresh 200
+    def resolve(self, url, response):
+        with self.lock:
+            if response.status_code == 304 and url in self.entries:
+                entry = self.entries[url]
+                entry["used"] = time.time()
+                self.dirty = True
+                self.hits += 1
+                return self.build_response(url, entry)
+
+            self.misses += 1
+            if response.status_code != 200:
+                return response
+
+            headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+            if ("ETag" in headers or "Last-Modified" in headers) and len(response.content) <= self.max_entry_bytes:
+                self.entries[url] = {"headers": headers, "body": response.text, "used": time.time()}
+                self.dirty = True
+            return response
+
+    def build_response(self, url, entry):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.encoding = "utf-8"
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response._content = entry["body"].encode("utf-8")
+        return response
+
+    def summary(self):
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0
+        return f"GitHub cache: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate), {len(self.entries)} entries"
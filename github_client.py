@@ -0,0 +1,201 @@
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from github_cache import ResponseCache, cacheable
+
+# GITHUB_API_URL points every call at another API root, e.g. the local fake_github.py
+# server; URLs the scripts build with the public root are rewritten to it
+PUBLIC_API_URL = "https://api.github.com"
+API_URL = os.environ.get("GITHUB_API_URL", PUBLIC_API_URL).rstrip("/")
+
+# Status codes that are worth retrying: server side errors and rate limits
+RETRY_STATUS = {500, 502, 503, 504}
+RATE_LIMIT_STATUS = {403, 429}
+
+
+# Shared GitHub API client: one pooled keep-alive session per token, with
+# retries, rate-limit pauses and per-call latency counters
+class GitHubClient:
+    def __init__(self, token=None, max_retries=5, backoff=1.0, max_backoff=60.0,
+                 min_remaining=25, max_rate_limit_wait=900, pool_size=16, timeout=30, cache=None):
+        self.cache = cache
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.min_remaining = min_remaining
+        self.max_rate_limit_wait = max_rate_limit_wait
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Accept"] = "application/vnd.github.v3+json"
+        if token:
+            self.session.headers["Authorization"] = f"token {token}"
+
+        self.lock = threading.Lock()
+        self.pause_until = 0.0
+        self.latency = {}
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request("PATCH", url, **kwargs)
+
+    # Run a GraphQL query, returning (data, errors)
+    def graphql(self, query, variables=None, name="graphql"):
+        response = self.post(f"{API_URL}/graphql", json={"query": query, "variables": variables or {}}, name=name)
+        if response.status_code != 200:
+            return None, [{"message": f"HTTP {response.status_code}"}]
+        payload = response.json()
+        return payload.get("data"), payload.get("errors")
+
+    # Send a request, retrying 5xx, connection errors and rate-limit responses
+    def request(self, method, url, name=None, **kwargs):
+        if not url.startswith("http"):
+            url = f"{API_URL}/{url.lstrip('/')}"
+        elif API_URL != PUBLIC_API_URL and url.startswith(PUBLIC_API_URL):
+            url = API_URL + url[len(PUBLIC_API_URL):]
+        name = name or f"{method} {url.split('?')[0]}"
+        kwargs.setdefault("timeout", self.timeout)
+
+        # Revalidate cached GETs instead of downloading them again; streamed downloads and
+        # endpoints outside the cache's allow-list bypass it
+        use_cache = self.cache is not None and method == "GET" and not kwargs.get("stream") and cacheable(url)
+        if use_cache:
+            headers = dict(kwargs.get("headers") or {})
+            headers.update(self.cache.conditional_headers(url))
+            kwargs["headers"] = headers
+
+        attempt = 0
+        while True:
+            self.wait_for_rate_limit()
+            start = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.record(name, time.monotonic() - start, error=True)
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.retry_delay(attempt)
+                print(f"[github] {name}: {e.__class__.__name__}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            self.record(name, time.monotonic() - start, error=response.status_code >= 400)
+            self.update_rate_limit(response)
+
+            delay = self.retry_after(response, attempt)
+            if delay is None or attempt >= self.max_retries:
+                return self.cache.resolve(url, response) if use_cache else response
+
+            print(f"[github] {name}: HTTP {response.status_code}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    # Jittered exponential backoff for the given attempt number
+    def retry_delay(self, attempt):
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        return random.uniform(delay / 2, delay)
+
+    # Return how long to wait before retrying the response, or None if it is final
+    def retry_after(self, response, attempt):
+        status = response.status_code
+        if status in RETRY_STATUS:
+            return self.retry_delay(attempt)
+
+        if status not in RATE_LIMIT_STATUS:
+            return None
+
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_rate_limit_wait)
+
+        # Primary rate limit exhausted: wait until the reset time
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            reset = response.headers.get("X-RateLimit-Reset")
+            if reset and reset.isdigit():
+                return min(max(int(reset) - time.time(), 0) + 1, self.max_rate_limit_wait)
+
+        # Secondary rate limits come back as 403 with a message instead of headers
+        if status == 429 or "rate limit" in response.text.lower():
+            return max(self.retry_delay(attempt), 60.0 if attempt == 0 else 0)
+
+        return None
+
+    # Pause all callers when the remaining quota drops below min_remaining
+    def update_rate_limit(self, response):
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        if not (remaining and remaining.isdigit() and reset and reset.isdigit()):
+            return
+        if int(remaining) >= self.min_remaining:
+            return
+
+        wait = min(max(int(reset) - time.time(), 0) + 1, self.max_rate_limit_wait)
+        with self.lock:
+            if time.monotonic() + wait > self.pause_until:
+                self.pause_until = time.monotonic() + wait
+                print(f"[github] Rate limit low ({remaining} left), pausing requests for {wait:.0f}s")
+
+    def wait_for_rate_limit(self):
+        with self.lock:
+            wait = self.pause_until - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+    def record(self, name, elapsed, error=False):
+        with self.lock:
+            entry = self.latency.setdefault(name, {"calls": 0, "errors": 0, "total": 0.0, "max": 0.0})
+            entry["calls"] += 1
+            entry["errors"] += 1 if error else 0
+            entry["total"] += elapsed
+            entry["max"] = max(entry["max"], elapsed)
+
+    # Per-call latency counters, keyed by call name
+    def stats(self):
+        with self.lock:
+            return {name: dict(entry) for name, entry in self.latency.items()}
+
+    def print_stats(self):
+        stats = self.stats()
+        if not stats:
+            return
+        if self.cache is not None:
+            print(f"\n {self.cache.summary()}")
+        print("\n GitHub API calls:")
+        for name, entry in sorted(stats.items()):
+            average = entry["total"] / entry["calls"]
+            print(f"  {name}: {entry['calls']} calls, {entry['errors']} errors, "
+                  f"avg {average * 1000:.0f}ms, max {entry['max'] * 1000:.0f}ms")
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+_cache = None
+
+
+# Return the shared client for a token, creating it on first use.
+# Set GITHUB_HTTP_CACHE=off to disable the on-disk response cache, and
+# GITHUB_MAX_RETRIES / GITHUB_RETRY_BACKOFF (seconds) to tune retries.
+def get_client(token=None):
+    global _cache
+    with _clients_lock:
+        if token not in _clients:
+            if _cache is None and os.environ.get("GITHUB_HTTP_CACHE", "").lower() != "off":
+                _cache = ResponseCache()
+            _clients[token] = GitHubClient(token, cache=_cache,
+                                           max_retries=int(os.environ.get("GITHUB_MAX_RETRIES", 5)),
+                                           backoff=float(os.environ.get("GITHUB_RETRY_BACKOFF", 1.0)))
+        return _clients[token]
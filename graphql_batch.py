@@ -0,0 +1,93 @@
+import json
+
+# Tags and branch head for one repository, reused under an alias per repo
+REPO_FIELDS = """
+    tags: refs(refPrefix: "refs/tags/", first: %(tag_count)d, orderBy: {field: TAG_COMMIT_DATE, direction: DESC}) {
+      nodes {
+        name
+        target { oid ... on Commit { tree { oid } } ... on Tag { target { oid ... on Commit { tree { oid } } } } }
+      }
+    }
+    head: ref(qualifiedName: %(head_ref)s) { target { oid ... on Commit { tree { oid } } } }
+"""
+
+
+def build_query(repositories, base, tag_count=100):
+    fields = REPO_FIELDS % {"tag_count": tag_count, "head_ref": json.dumps(f"refs/heads/{base}")}
+    parts = []
+    for i, (owner, repo) in enumerate(repositories):
+        parts.append(f"  r{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(repo)}) {{{fields}  }}")
+    return "query {\n" + "\n".join(parts) + "\n}"
+
+
+# Resolve the recent tags and the base branch head of every repository in one
+# GraphQL request. Returns {"owner/repo": {"refs": [...], "head": sha, "trees": {commit sha: tree sha}}},
+# where refs use the same shape as the REST matching-refs endpoint. Repos that
+# could not be resolved are left out so callers fall back to REST.
+def resolve_repos(client, repositories, base, tag_count=100):
+    if not repositories:
+        return {}
+
+    data, errors = client.graphql(build_query(repositories, base, tag_count), name="graphql_batch")
+    if errors:
+        for error in errors:
+            print(f"Warning: GraphQL batch lookup: {error.get('message', 'unknown error')}")
+    if not data:
+        return {}
+
+    resolved = {}
+    for i, (owner, repo) in enumerate(repositories):
+        node = data.get(f"r{i}")
+        if not node:
+            continue
+
+        refs = []
+        trees = {}
+        for tag in (node.get("tags") or {}).get("nodes", []):
+            target = tag.get("target") or {}
+            # Annotated tags point at a tag object; peel it to the commit
+            commit = target.get("target") or target
+            refs.append({"ref": f"refs/tags/{tag['name']}", "object": {"sha": commit.get("oid"), "type": "commit"}})
+            if (commit.get("tree") or {}).get("oid"):
+                trees[commit["oid"]] = commit["tree"]["oid"]
+
+        target = (node.get("head") or {}).get("target") or {}
+        head = target.get("oid")
+        if (target.get("tree") or {}).get("oid"):
+            trees[head] = target["tree"]["oid"]
+        resolved[f"{owner}/{repo}"] = {"refs": refs, "head": head, "trees": trees}
+    return resolved
+
+
+COMPARE_QUERY = """
+query($owner: String!, $repo: String!, $baseRef: String!, $headRef: String!, $commitCount: Int!) {
+  repository(owner: $owner, name: $repo) {
+    ref(qualifiedName: $baseRef) {
+      compare(headRef: $headRef) {
+        aheadBy
+        commits(first: $commitCount) {
+          nodes { message author { name } }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+# Commits head_ref has on top of base_ref, oldest first, without the per-file patches
+# the REST compare endpoint always includes. Returns (ahead_by, [{"message", "author"}])
+# or None if GraphQL could not answer.
+def compare_commits(client, owner, repo, base_ref, head_ref, commit_count=100):
+    data, errors = client.graphql(COMPARE_QUERY, {
+        "owner": owner, "repo": repo, "baseRef": base_ref, "headRef": head_ref, "commitCount": commit_count,
+    }, name="compare_commits")
+    if errors or not data:
+        return None
+
+    ref = (data.get("repository") or {}).get("ref")
+    if not ref or not ref.get("compare"):
+        return None
+
+    compare = ref["compare"]
+    return compare["aheadBy"], compare["commits"]["nodes"]
@@ -0,0 +1,295 @@
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from git_mirror import ensure_mirror, fetch_branch, mirror_path_for
+from manifest_rewrite import TagRewriter, image_names
+from manifest_scan import MANIFEST_SUFFIXES
+
+
+def git_output(mirror_path, *args, input=None, env=None):
+    result = subprocess.run(["git", "-C", mirror_path, *args], input=input, capture_output=True, env=env)
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, ["git", *args], result.stdout, result.stderr)
+    return result.stdout
+
+
+# Outcome of one clone-free deployment
+class CommitResult:
+    def __init__(self, branch):
+        self.branch = branch
+        self.base = None
+        self.commit = None
+        self.files = []
+        self.updated = []
+        self.locations = {}
+        self.pushed = False
+        self.error = None
+        self.attempts = 0
+        self.elapsed = None
+
+    def to_dict(self):
+        return {
+            "branch": self.branch, "base": self.base, "commit": self.commit, "files": self.files,
+            "updated": self.updated, "locations": self.locations, "pushed": self.pushed, "error": self.error, "attempts": self.attempts,
+            "elapsed": self.elapsed,
+        }
+
+
+# Push errors that mean another deployer moved the branch first, so the edits
+# can simply be applied again on top of the new head
+RETRYABLE_PUSH_ERRORS = ("non-fast-forward", "fetch first", "cannot lock ref", "failed to update ref",
+                         "stale info", "incorrect old value")
+
+
+def is_push_race(error):
+    return bool(error) and any(marker in error for marker in RETRYABLE_PUSH_ERRORS)
+
+
+# Randomised, growing pause between attempts so racing deployers spread out
+def retry_delay(attempt, backoff):
+    return random.uniform(0.5, 1.5) * backoff * attempt
+
+
+# (mode, blob sha, path) of every manifest under services_dir in a commit
+def list_manifests(mirror_path, commit, services_dir="services"):
+    manifests = []
+    output = git_output(mirror_path, "ls-tree", "-r", "-z", commit, "--", services_dir)
+    for record in output.split(b"\0"):
+        if not record:
+            continue
+        meta, path = record.split(b"\t", 1)
+        mode, kind, sha = meta.split()
+        path = path.decode("utf-8")
+        if kind == b"blob" and path.endswith(MANIFEST_SUFFIXES):
+            manifests.append((mode.decode(), sha.decode(), path))
+    return manifests
+
+
+# The mirror is a blobless partial clone: fetch the blobs it lacks in one request
+# instead of letting git fetch them lazily one at a time
+def prefetch_blobs(mirror_path, commit, shas):
+    output = git_output(mirror_path, "rev-list", "--objects", "--missing=print", commit)
+    missing = [line[1:] for line in output.decode().splitlines() if line.startswith("?") and line[1:] in shas]
+    if missing:
+        git_output(mirror_path, "-c", "fetch.negotiationAlgorithm=noop", "fetch", "--quiet", "--no-tags",
+                   "origin", *missing)
+    return len(missing)
+
+
+# Contents of many blobs from a single `git cat-file --batch`
+def read_blobs(mirror_path, shas):
+    output = git_output(mirror_path, "cat-file", "--batch", input="".join(f"{sha}\n" for sha in shas).encode())
+    blobs = {}
+    position = 0
+    for sha in shas:
+        header_end = output.index(b"\n", position)
+        _, _, size = output[position:header_end].split()
+        start = header_end + 1
+        blobs[sha] = output[start:start + int(size)]
+        position = start + int(size) + 1
+    return blobs
+
+
+# Image names per manifest blob, stored inside the bare mirror
+BLOB_NAMES_FILE = "jenkins-cicd-blob-names.json"
+
+
+# Image names mentioned by each manifest blob, kept in the mirror between runs. Blobs
+# are immutable, so an entry never goes stale; it only saves reading the blob again
+def load_blob_names(mirror_path):
+    try:
+        with open(os.path.join(mirror_path, BLOB_NAMES_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_blob_names(mirror_path, blob_names):
+    path = os.path.join(mirror_path, BLOB_NAMES_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(blob_names, f)
+    os.replace(tmp_path, path)
+
+
+# Write many blobs with one `git hash-object --stdin-paths`; returns their shas in order
+def write_blobs(mirror_path, contents):
+    if not contents:
+        return []
+    with tempfile.TemporaryDirectory(prefix="manifest-blobs-") as tmp:
+        paths = []
+        for number, content in enumerate(contents):
+            paths.append(os.path.join(tmp, str(number)))
+            with open(paths[-1], "wb") as f:
+                f.write(content)
+        output = git_output(mirror_path, "hash-object", "-w", "--no-filters", "--stdin-paths",
+                            input="".join(f"{path}\n" for path in paths).encode())
+    return output.decode().split()
+
+
+# Write a copy of commit's tree with the given {path: (mode, blob sha)} replacements.
+# The tree is read into a throwaway index, the changed entries are swapped in with one
+# `update-index --index-info` and `write-tree` creates every changed tree object at once.
+# --missing-ok keeps git from checking, or lazily fetching, the blobs a blobless mirror lacks.
+def write_tree(mirror_path, commit, changes):
+    with tempfile.TemporaryDirectory(prefix="manifest-index-") as tmp:
+        env = dict(os.environ, GIT_INDEX_FILE=os.path.join(tmp, "index"))
+        git_output(mirror_path, "read-tree", commit, env=env)
+        info = b"".join(f"{mode} {sha}\t{path}".encode("utf-8") + b"\0" for path, (mode, sha) in sorted(changes.items()))
+        git_output(mirror_path, "update-index", "-z", "--index-info", input=info, env=env)
+        return git_output(mirror_path, "write-tree", "--missing-ok", env=env).decode().strip()
+
+
+# Rewrite the manifests of a commit in memory. Returns ({path: (mode, new blob sha)},
+# updated image names, {image name: [paths]}).
+#
+# Only blobs that mention one of the rewriter's image names are read, using the blob
+# names kept in the mirror; a blob seen for the first time is read once to learn its
+# names. With a blob_cache dict, blobs read by an earlier call are not read again.
+def rewrite_commit(mirror_path, commit, rewriter, services_dir="services", blob_cache=None):
+    manifests = list_manifests(mirror_path, commit, services_dir)
+    shas = set(sha for _, sha, _ in manifests)
+
+    blob_names = load_blob_names(mirror_path)
+    known = len(blob_names)
+    wanted = rewriter.image_names()
+    needed = sorted(sha for sha in shas if sha not in blob_names or wanted & set(blob_names[sha]))
+
+    cache = blob_cache if blob_cache is not None else {}
+    blobs = {sha: cache[sha] for sha in needed if sha in cache}
+    uncached = [sha for sha in needed if sha not in blobs]
+    if uncached:
+        prefetch_blobs(mirror_path, commit, set(uncached))
+        blobs.update(read_blobs(mirror_path, uncached))
+    for sha in needed:
+        blob_names.setdefault(sha, sorted(image_names(blobs[sha])))
+
+    # The same blob can sit at several paths; rewrite it once
+    rewritten = {}
+    for sha in needed:
+        if not wanted & set(blob_names[sha]):
+            continue
+        content = blobs[sha].decode("utf-8")
+        updated_content, names = rewriter.rewrite(content)
+        if updated_content != content:
+            rewritten[sha] = (updated_content.encode("utf-8"), names)
+
+    new_shas = dict(zip(rewritten, write_blobs(mirror_path, [data for data, _ in rewritten.values()])))
+    written = {}
+    for sha, new_sha in new_shas.items():
+        written[new_sha] = rewritten[sha][0]
+        blob_names[new_sha] = sorted(image_names(written[new_sha]))
+
+    changes = {}
+    updated = []
+    locations = {}
+    for mode, sha, path in manifests:
+        if sha not in rewritten:
+            continue
+        changes[path] = (mode, new_shas[sha])
+        names = rewritten[sha][1]
+        updated.extend(names)
+        for name in names:
+            locations.setdefault(name, []).append(path)
+
+    # Keep only the blobs of this commit and of the one about to be created
+    if len(blob_names) != known or len(blob_names) > len(shas) + len(written):
+        save_blob_names(mirror_path, {sha: blob_names[sha] for sha in shas | set(written) if sha in blob_names})
+
+    if blob_cache is not None:
+        kept = {sha: data for sha, data in blob_cache.items() if sha in shas}
+        blob_cache.clear()
+        blob_cache.update(kept)
+        blob_cache.update(blobs)
+        blob_cache.update(written)
+    return changes, updated, locations
+
+
+# Fast-forward the remote branch to commit; returns (pushed, git error output)
+def push_commit(mirror_path, url, branch, commit):
+    result = subprocess.run(["git", "-C", mirror_path, "push", "--quiet", url, f"{commit}:refs/heads/{branch}"],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return False, result.stderr.strip()
+    git_output(mirror_path, "update-ref", f"refs/remotes/origin/{branch}", commit)
+    return True, None
+
+
+# Deploy tag changes without a working tree: fetch the branch tip into the bare
+# mirror, rewrite the manifests in memory, then create the blobs, trees and commit
+# with git plumbing and push that commit as a fast-forward of the branch.
+#
+# Concurrency is optimistic: when another deployer moved the branch first the push
+# is rejected, and the same tag edits are applied again on the new head and pushed,
+# up to max_attempts times. There is no rebase, so there are no conflicts to resolve.
+def commit_tag_changes(mirror_path, url, branch, rewriter, message, services_dir="services", max_attempts=5,
+                       backoff=0.2, blob_cache=None):
+    result = CommitResult(branch)
+    start = time.time()
+    ensure_mirror(mirror_path, url)
+
+    while True:
+        result.attempts += 1
+        fetch_branch(mirror_path, branch)
+        result.base = git_output(mirror_path, "rev-parse", f"refs/remotes/origin/{branch}").decode().strip()
+
+        changes, result.updated, result.locations = rewrite_commit(mirror_path, result.base, rewriter, services_dir,
+                                                                   blob_cache)
+        result.files = sorted(changes)
+        result.commit = None
+        if not changes:
+            # Nothing to do, possibly because a concurrent deployer already set the same tags
+            result.error = None
+            break
+
+        tree = write_tree(mirror_path, result.base, changes)
+        result.commit = git_output(mirror_path, "commit-tree", tree, "-p", result.base, "-m", message).decode().strip()
+        result.pushed, result.error = push_commit(mirror_path, url, branch, result.commit)
+        if result.pushed or not is_push_race(result.error) or result.attempts >= max_attempts:
+            break
+        time.sleep(retry_delay(result.attempts, backoff))
+
+    result.elapsed = round(time.time() - start, 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Commit image tag changes to a GitOps repo without a checkout")
+    parser.add_argument("remote", help="Remote URL, e.g. https://<token>@github.com/<owner>/<repo>.git or file:///path/repo.git")
+    parser.add_argument("new_tag", help="New released tag, e.g. v18.0.0")
+    parser.add_argument("target_repos", help="Comma-separated services to update")
+    parser.add_argument("--branch", default="main")
+    parser.add_argument("--mirror", help="Bare mirror to work in (default: next to the remote name in the mirror cache)")
+    parser.add_argument("--message", help="Commit message (default: 'Updated tag to <new_tag>')")
+    parser.add_argument("--max-attempts", type=int, default=5, help="Pushes to try when other deployers win the race")
+    args = parser.parse_args()
+
+    if not re.match(r"^v\d+\.\d+\.\d+$", args.new_tag):
+        print("Invalid tag format. Use the format vX.Y.Z (e.g., v18.0.0).", file=sys.stderr)
+        return 1
+
+    mirror_path = args.mirror
+    if not mirror_path:
+        name = os.path.basename(args.remote.rstrip("/"))
+        mirror_path = mirror_path_for("local", name[:-4] if name.endswith(".git") else name)
+
+    rewriter = TagRewriter(args.new_tag, args.target_repos)
+    result = commit_tag_changes(mirror_path, args.remote, args.branch, rewriter,
+                                args.message or f"Updated tag to {args.new_tag}", max_attempts=args.max_attempts)
+    for path in result.files:
+        print(f"Tag updated in: {path}", file=sys.stderr)
+    if result.error:
+        print(f"Push rejected after {result.attempts} attempts: {result.error}", file=sys.stderr)
+    print(json.dumps(result.to_dict()))
+    return 0 if result.pushed or not result.files else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import json
+import os
+import subprocess
+
+from manifest_rewrite import IMAGE_TAG_PATTERN
+from manifest_scan import MANIFEST_SUFFIXES, walk_manifests
+
+# Default directory of the index files, one per GitOps clone
+DEFAULT_INDEX_DIR = os.path.join(os.path.expanduser("~"), ".cache", "jenkins-cicd")
+
+
+def git(repo_path, *args):
+    result = subprocess.run(["git", "-C", repo_path, *args], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+# Image blocks in one manifest as [image name, line number, current tag]
+def index_file(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+    except (OSError, UnicodeDecodeError):
+        return []
+
+    entries = []
+    for match in IMAGE_TAG_PATTERN.finditer(content):
+        name = match.group(2).split("/")[-1]
+        tag_start = match.end(1)
+        line = content.count("\n", 0, tag_start) + 1
+        entries.append([name, line, content[tag_start:match.end()]])
+    return entries
+
+
+# On-disk map of image repository name -> (file, line, current tag) for a GitOps
+# clone. It is keyed by the git tree SHA of services/ and refreshed incrementally
+# from `git diff --name-only`, so only files that changed since the indexed
+# commit are read again.
+class ManifestIndex:
+    def __init__(self, repo_path, services_dir="services", path=None):
+        self.repo_path = repo_path
+        self.services_dir = services_dir
+        name = os.path.basename(os.path.normpath(repo_path))
+        self.path = path or os.path.join(DEFAULT_INDEX_DIR, f"manifest-index-{name}.json")
+        self.tree_sha = None
+        self.commit = None
+        self.files = {}
+        self.load()
+
+    @property
+    def services_path(self):
+        return os.path.join(self.repo_path, self.services_dir)
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.tree_sha = data.get("tree_sha")
+        self.commit = data.get("commit")
+        self.files = data.get("files", {})
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"tree_sha": self.tree_sha, "commit": self.commit, "files": self.files}, f)
+        os.replace(tmp_path, self.path)
+
+    def reindex(self, relative_path):
+        full_path = os.path.join(self.repo_path, relative_path)
+        if not os.path.isfile(full_path) or not relative_path.endswith(MANIFEST_SUFFIXES):
+            self.files.pop(relative_path, None)
+            return
+        entries = index_file(full_path)
+        if entries:
+            self.files[relative_path] = entries
+        else:
+            self.files.pop(relative_path, None)
+
+    def rebuild(self):
+        self.files = {}
+        manifests, _ = walk_manifests(self.services_path)
+        for manifest in manifests:
+            self.reindex(os.path.relpath(manifest, self.repo_path).replace(os.sep, "/"))
+
+    # Bring the index up to date with HEAD; returns the number of files re-read
+    def refresh(self):
+        tree_sha = git(self.repo_path, "rev-parse", f"HEAD:{self.services_dir}")
+        commit = git(self.repo_path, "rev-parse", "HEAD")
+        if tree_sha is None or commit is None:
+            self.rebuild()
+            return len(self.files)
+
+        if tree_sha == self.tree_sha:
+            return 0
+
+        changed = None
+        if self.commit:
+            changed = git(self.repo_path, "diff", "--name-only", "--no-renames", f"{self.commit}..{commit}", "--", self.services_dir)
+
+        if changed is None:
+            self.rebuild()
+            reread = len(self.files)
+        else:
+            paths = [path for path in changed.splitlines() if path]
+            for path in paths:
+                self.reindex(path)
+            reread = len(paths)
+
+        self.tree_sha = tree_sha
+        self.commit = commit
+        self.save()
+        return reread
+
+    # {image name: [(file, line, tag), ...]} for the given names
+    def locate(self, names):
+        names = set(names)
+        found = {}
+        for path, entries in self.files.items():
+            for name, line, tag in entries:
+                if name in names:
+                    found.setdefault(name, []).append((path, line, tag))
+        return found
+
+    # Absolute paths of the manifests that mention any of the given image names
+    def files_for(self, names):
+        paths = set()
+        for locations in self.locate(names).values():
+            for path, _, _ in locations:
+                paths.add(os.path.join(self.repo_path, path.replace("/", os.sep)))
+        return sorted(paths)
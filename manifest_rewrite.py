@@ -0,0 +1,300 @@
+import re
+
+# Every "repository: ghcr.io/<owner>/<repo>" or "repository: ghcr.io/<owner>/<suborg>/<repo>"
+# line followed by a "tag: vX.Y.Z" line, matched in a single pass over the file
+IMAGE_TAG_PATTERN = re.compile(
+    r"(repository:\s*ghcr\.io/([\w-]+/[\w-]+(?:/[\w-]+)?)\s*\n\s*tag:\s*)v[\d\.]+",
+    re.MULTILINE
+)
+
+# The same pattern over bytes, for patching memory-mapped files
+IMAGE_TAG_BYTES = re.compile(IMAGE_TAG_PATTERN.pattern.encode(), re.MULTILINE)
+
+# Last path component of every ghcr.io image reference, i.e. the image names a file mentions
+IMAGE_NAME_BYTES = re.compile(rb"ghcr\.io/(?:[\w-]+/)*([\w-]+)")
+
+SIRIUS_PREFIX = "gi-sirius-"
+
+
+# Image names mentioned in a manifest's bytes. Both rewriters only change tags of
+# ghcr.io images, so a file whose names miss a rewriter's image_names() is left as-is
+def image_names(data):
+    return set(name.decode() for name in IMAGE_NAME_BYTES.findall(data))
+
+
+# Rewrites image tags for a set of target services in one scan per file. Each
+# service can carry its own tag, so a whole release train is applied in one scan.
+#
+# Generic images (ghcr.io/<owner>/<repo>) are updated when <repo> is a target.
+# gi-sirius images (ghcr.io/<owner>/<suborg>/gi-sirius-<suffix>) are updated when
+# a target "gi-<suffix>" was given, e.g. gi-kyc-service -> gi-sirius-kyc-service.
+class TagRewriter:
+    def __init__(self, new_tag, target_repos, tags=None):
+        self.new_tag = new_tag
+
+        # Tag per service: new_tag for every listed service, plus any {service: tag} from a release manifest
+        self.tags = dict(tags or {})
+        for repo in target_repos.split(","):
+            if repo.strip():
+                self.tags.setdefault(repo.strip(), new_tag)
+
+        # Full repo names as provided
+        self.allowed_repo_names = set(self.tags)
+
+        # For gi-sirius-* we match on suffix after removing 'gi-'
+        self.sirius_allowed_suffixes = set([
+            repo.replace("gi-", "").strip()
+            for repo in self.allowed_repo_names
+            if repo.startswith("gi-")
+        ])
+
+        # Lookup table: number of path components -> {image name: tag to set}
+        self.targets = {
+            2: dict(self.tags),
+            3: dict((f"{SIRIUS_PREFIX}{repo.replace('gi-', '').strip()}", tag)
+                    for repo, tag in self.tags.items() if repo.startswith("gi-")),
+        }
+
+        # Literal prefilter: files that mention none of the target names are skipped without a regex scan
+        literals = sorted(set(self.targets[2]) | set(self.targets[3]), key=len, reverse=True)
+        self.prefilter = re.compile("|".join(re.escape(name) for name in literals)) if literals else None
+        self.prefilter_bytes = re.compile(self.prefilter.pattern.encode()) if literals else None
+
+    # Image names this rewriter can update
+    def image_names(self):
+        return set(self.targets[2]) | set(self.targets[3])
+
+    # Tag to set for an image path, or None when the image is not a target
+    def tag_for(self, image_path):
+        parts = image_path.split("/")
+        return self.targets.get(len(parts), {}).get(parts[-1])
+
+    def is_target(self, image_path):
+        return self.tag_for(image_path) is not None
+
+    # Return (updated_content, updated image names); content is returned as-is when nothing matched
+    def rewrite(self, content):
+        if self.prefilter is None or not self.prefilter.search(content):
+            return content, []
+
+        updated = []
+
+        def replace(match):
+            tag = self.tag_for(match.group(2))
+            if tag is None:
+                return match.group(0)
+            updated.append(match.group(2).split("/")[-1])
+            return f"{match.group(1)}{tag}"
+
+        return IMAGE_TAG_PATTERN.sub(replace, content), updated
+
+    # Byte spans to patch in a bytes-like buffer such as an mmap, as [(start, end, new bytes)],
+    # plus the updated image names; tags that already have the new value are left out
+    def spans(self, data):
+        if self.prefilter_bytes is None or not self.prefilter_bytes.search(data):
+            return [], []
+
+        spans = []
+        updated = []
+        for match in IMAGE_TAG_BYTES.finditer(data):
+            image_path = match.group(2).decode()
+            tag = self.tag_for(image_path)
+            if tag is None or match.group(0)[len(match.group(1)):] == tag.encode():
+                continue
+            spans.append((match.end(1), match.end(), tag.encode()))
+            updated.append(image_path.split("/")[-1])
+        return spans, updated
+
+
+# "repository: ghcr.io/gripinvest/<suborg>/gi-sirius-<suffix>" as used by production_deployment.py
+SIRIUS_REPOSITORY = re.compile(r"ghcr\.io/gripinvest/[-\w]+/(gi-sirius-([\w-]+))\s*(#.*)?$")
+
+# One YAML "key: value" line, optionally as the first key of a "- " list item
+YAML_KEY_LINE = re.compile(r"^(\s*)((?:-\s+)*)([\w-]+):(\s*)(.*?)(\s*)$")
+
+# A v-prefixed tag value, optionally quoted and followed by a comment
+TAG_VALUE = re.compile(r"""^(["']?)v[\d.]+(["']?)(\s+#.*)?$""")
+
+
+# Rewrites gi-sirius image tags by YAML structure instead of a lazy regex span.
+#
+# Each repository line is paired with the "tag:" key of the same mapping, i.e.
+# a sibling at the same indentation, whether it comes before or after the
+# repository key and whatever keys sit in between. A tag belonging to another
+# image is never touched. All edits are applied in one pass over the lines, so
+# the cost stays linear in the file size however many services a file holds.
+class SiriusBlockRewriter:
+    def __init__(self, new_tag, target_repos):
+        self.new_tag = new_tag
+        # Extract suffixes from full service names like 'gi-kyc-service' → 'kyc-service'
+        self.allowed_suffixes = set(
+            repo.strip().replace("gi-", "") for repo in target_repos.split(",") if repo.strip()
+        )
+
+    # Image names this rewriter can update
+    def image_names(self):
+        return set(f"{SIRIUS_PREFIX}{suffix}" for suffix in self.allowed_suffixes)
+
+    # Parse lines into (key column, starts list item, key, match) tuples; None for non-key lines
+    def parse(self, lines):
+        parsed = []
+        for line in lines:
+            stripped = line.strip()
+            match = YAML_KEY_LINE.match(line) if stripped and not stripped.startswith("#") else None
+            if match is None:
+                parsed.append(None)
+                continue
+            column = len(match.group(1)) + len(match.group(2))
+            parsed.append((column, bool(match.group(2)), match.group(3), match))
+        return parsed
+
+    # Index of the "tag" key in the same mapping as the key on line index, or None
+    def find_sibling_tag(self, parsed, index):
+        column, item_start, _, _ = parsed[index]
+
+        # Forward until the mapping ends or the next list item starts
+        for j in range(index + 1, len(parsed)):
+            entry = parsed[j]
+            if entry is None or entry[0] > column:
+                continue
+            if entry[0] < column or entry[1]:
+                break
+            if entry[2] == "tag":
+                return j
+
+        # Backward to the start of the mapping (the "- " line of a list item)
+        if not item_start:
+            for j in range(index - 1, -1, -1):
+                entry = parsed[j]
+                if entry is None or entry[0] > column:
+                    continue
+                if entry[0] < column:
+                    break
+                if entry[2] == "tag":
+                    return j
+                if entry[1]:
+                    break
+        return None
+
+    # Tag edit for the repository key on line index as (tag line index, start, end, new value,
+    # image name), start and end being character positions of the tag value in that line;
+    # None when the line is not a target gi-sirius repository or its mapping has no tag
+    def edit_for(self, parsed, index):
+        entry = parsed[index]
+        if entry is None or entry[2] != "repository":
+            return None
+        image = SIRIUS_REPOSITORY.match(entry[3].group(5))
+        if image is None:
+            return None
+
+        full_repo, suffix = image.group(1), image.group(2)
+        if suffix not in self.allowed_suffixes:
+            return None
+
+        tag_index = self.find_sibling_tag(parsed, index)
+        if tag_index is None:
+            return None
+        tag_match = parsed[tag_index][3]
+        value = TAG_VALUE.match(tag_match.group(5))
+        if value is None:
+            return None
+
+        new_value = f"{value.group(1)}{self.new_tag}{value.group(2)}{value.group(3) or ''}"
+        return tag_index, tag_match.start(5), tag_match.end(5), new_value, full_repo
+
+    # Tag edits for the target images in a list of lines
+    def edits(self, lines):
+        parsed = self.parse(lines)
+        found = []
+        for index in range(len(parsed)):
+            edit = self.edit_for(parsed, index)
+            if edit is not None:
+                found.append(edit)
+        return found
+
+    # Return (updated_content, updated image names); content is returned as-is when nothing matched
+    def rewrite(self, content):
+        if "gi-sirius-" not in content:
+            return content, []
+
+        lines = content.split("\n")
+        edits = self.edits(lines)
+        if not edits:
+            return content, []
+
+        for index, start, end, new_value, _ in edits:
+            lines[index] = lines[index][:start] + new_value + lines[index][end:]
+        return "\n".join(lines), [edit[4] for edit in edits]
+
+    # The mapping around the repository key at data[line_start:line_end], read line by line
+    # from the buffer: (byte offsets, decoded lines, index of the repository line). Only the
+    # lines find_sibling_tag can look at are decoded, up to the first sibling tag key.
+    def mapping_window(self, data, line_start, line_end):
+        line = data[line_start:line_end].decode("utf-8")
+        entry = self.parse([line])[0]
+        if entry is None or entry[2] != "repository":
+            return None
+        column = entry[0]
+
+        before = []
+        if not entry[1]:
+            end = line_start - 1
+            while end >= 0:
+                start = data.rfind(b"\n", 0, end) + 1
+                text = data[start:end].decode("utf-8")
+                parsed = self.parse([text])[0]
+                if parsed is not None and parsed[0] < column:
+                    break
+                before.append((start, text))
+                if parsed is not None and parsed[0] == column and (parsed[1] or parsed[2] == "tag"):
+                    break
+                end = start - 1
+
+        after = []
+        start = line_end + 1
+        while start <= len(data):
+            end = data.find(b"\n", start)
+            end = len(data) if end < 0 else end
+            text = data[start:end].decode("utf-8")
+            parsed = self.parse([text])[0]
+            if parsed is not None and (parsed[0] < column or (parsed[0] == column and parsed[1])):
+                break
+            after.append((start, text))
+            if parsed is not None and parsed[0] == column and parsed[2] == "tag":
+                break
+            start = end + 1
+
+        window = before[::-1] + [(line_start, line)] + after
+        return [offset for offset, _ in window], [text for _, text in window], len(before)
+
+    # Byte spans to patch in a bytes-like buffer such as an mmap, as [(start, end, new bytes)],
+    # plus the updated image names. gi-sirius repository lines are found with find() on the
+    # buffer and only the mappings around them are decoded, so memory does not grow with the file.
+    def spans(self, data):
+        spans = []
+        updated = []
+        position = data.find(b"gi-sirius-")
+        while position >= 0:
+            line_start = data.rfind(b"\n", 0, position) + 1
+            line_end = data.find(b"\n", position)
+            line_end = len(data) if line_end < 0 else line_end
+            position = data.find(b"gi-sirius-", line_end)
+
+            window = self.mapping_window(data, line_start, line_end)
+            if window is None:
+                continue
+            offsets, lines, index = window
+            edit = self.edit_for(self.parse(lines), index)
+            if edit is None:
+                continue
+
+            tag_index, start, end, new_value, full_repo = edit
+            line = lines[tag_index]
+            if line[start:end] == new_value:
+                continue
+            byte_start = offsets[tag_index] + len(line[:start].encode("utf-8"))
+            byte_end = byte_start + len(line[start:end].encode("utf-8"))
+            spans.append((byte_start, byte_end, new_value.encode("utf-8")))
+            updated.append(full_repo)
+        spans.sort()
+        return spans, updated
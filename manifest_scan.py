@@ -0,0 +1,248 @@
+import mmap
+import os
+import shutil
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+MANIFEST_SUFFIXES = (".yaml", ".yml")
+
+# Outcome of one manifest: updated image names, error text and the time spent in each phase
+FileResult = namedtuple("FileResult", "path size updated error read_seconds match_seconds write_seconds")
+
+
+# Every manifest below root at any depth, e.g. services/<svc>/overlays/<env>/values.yaml.
+# Directory entries come from os.scandir, whose cached entry types save a stat per
+# entry; hidden directories such as .git are not entered.
+def walk_manifests(root, suffixes=MANIFEST_SUFFIXES):
+    manifests = []
+    directories = 0
+    pending = [root]
+    while pending:
+        path = pending.pop()
+        try:
+            entries = os.scandir(path)
+        except OSError as e:
+            print(f"Error reading directory {path}: {e}")
+            continue
+        directories += 1
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.startswith("."):
+                        pending.append(entry.path)
+                elif entry.name.endswith(suffixes) and entry.is_file():
+                    manifests.append(entry.path)
+    manifests.sort()
+    return manifests, directories
+
+
+def temp_path_for(path):
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+
+
+# Write a str, or chunks of bytes, to a temp file next to path and return the temp file's path
+def write_temp(path, content=None, chunks=None):
+    tmp_path = temp_path_for(path)
+    try:
+        if content is not None:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            with open(tmp_path, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return tmp_path
+
+
+# Swap a finished temp file in for path, keeping the file mode
+def replace_with(path, tmp_path):
+    try:
+        shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# Replace a manifest through a temp file in the same directory, so a crash leaves
+# either the old or the new file and never a truncated one
+def atomic_write(path, content):
+    replace_with(path, write_temp(path, content=content))
+
+
+# Read, rewrite and (when changed) write one manifest; module level so a process pool can run it
+def rewrite_file(rewriter, path):
+    start = time.perf_counter()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+    except Exception as e:
+        return FileResult(path, 0, [], f"Error reading {path}: {e}", time.perf_counter() - start, 0.0, 0.0)
+    read_done = time.perf_counter()
+
+    updated_content, updated = rewriter.rewrite(content)
+    match_done = time.perf_counter()
+
+    error = None
+    if updated_content == content:
+        updated = []
+    else:
+        try:
+            atomic_write(path, updated_content)
+        except Exception as e:
+            error = f"Error writing to {path}: {e}"
+            updated = []
+    write_done = time.perf_counter()
+
+    return FileResult(path, len(content), updated, error,
+                      read_done - start, match_done - read_done, write_done - match_done)
+
+
+# Original bytes between the spans interleaved with the replacements, as memoryview slices of the map
+def patched_chunks(view, spans):
+    position = 0
+    for start, end, replacement in spans:
+        yield view[position:start]
+        yield replacement
+        position = end
+    yield view[position:]
+
+
+# Patch one manifest through a memory map instead of reading it into a string.
+# The tag spans are found as byte offsets. A single replacement of the same length
+# as the old tag is written back in place with one write. Anything more is streamed
+# into a temp file with the edits applied and swapped in with os.replace, so a crash
+# never leaves some tags updated and others not. Memory follows the edits, not the
+# file size.
+def patch_file(rewriter, path):
+    start = time.perf_counter()
+    read_done = match_done = start
+    spans, updated = [], []
+    size = 0
+    tmp_path = None
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    read_done = time.perf_counter()
+                    spans, updated = rewriter.spans(data)
+                    match_done = time.perf_counter()
+
+                    # The temp file is written while the map is open and swapped in once it is closed
+                    if len(spans) > 1 or any(end - begin != len(replacement) for begin, end, replacement in spans):
+                        with memoryview(data) as view:
+                            tmp_path = write_temp(path, chunks=patched_chunks(view, spans))
+    except Exception as e:
+        return FileResult(path, size, [], f"Error reading {path}: {e}", time.perf_counter() - start, 0.0, 0.0)
+
+    error = None
+    try:
+        if tmp_path is not None:
+            replace_with(path, tmp_path)
+        elif spans:
+            begin, _, replacement = spans[0]
+            with open(path, "r+b") as f:
+                f.seek(begin)
+                f.write(replacement)
+                f.flush()
+                os.fsync(f.fileno())
+    except Exception as e:
+        error = f"Error writing to {path}: {e}"
+        updated = []
+    write_done = time.perf_counter()
+
+    return FileResult(path, size, updated, error,
+                      read_done - start, match_done - read_done, write_done - match_done)
+
+
+# Per-phase counts and timings of one scan. Phase seconds are summed over the
+# workers; "wall" is the elapsed time of the whole scan.
+class ScanStats:
+    def __init__(self, source="walk"):
+        # "walk" when the files came from walking the tree, "index" when from a manifest index
+        self.source = source
+        self.directories = 0
+        self.files = 0
+        self.bytes = 0
+        self.updated = 0
+        self.errors = 0
+        self.workers = 1
+        self.mode = "serial"
+        self.seconds = {"walk": 0.0, "read": 0.0, "match": 0.0, "write": 0.0, "wall": 0.0}
+
+    def add(self, result):
+        self.files += 1
+        self.bytes += result.size
+        self.updated += 1 if result.updated else 0
+        self.errors += 1 if result.error else 0
+        self.seconds["read"] += result.read_seconds
+        self.seconds["match"] += result.match_seconds
+        self.seconds["write"] += result.write_seconds
+
+    def as_dict(self):
+        return {"source": self.source, "directories": self.directories, "files": self.files, "bytes": self.bytes,
+                "updated": self.updated, "errors": self.errors, "workers": self.workers, "mode": self.mode,
+                "seconds": {phase: round(value, 6) for phase, value in self.seconds.items()}}
+
+    def print_stats(self):
+        print(f"\n Manifest scan ({self.mode}, {self.workers} workers):")
+        if self.source == "index":
+            print(f"  index: {self.files} files")
+        else:
+            print(f"  walk: {self.directories} directories, {self.files} files in {self.seconds['walk'] * 1000:.0f}ms")
+        print(f"  read: {self.bytes} bytes in {self.seconds['read'] * 1000:.0f}ms")
+        print(f"  match: {self.seconds['match'] * 1000:.0f}ms")
+        print(f"  write: {self.updated} files in {self.seconds['write'] * 1000:.0f}ms")
+        print(f"  total: {self.seconds['wall'] * 1000:.0f}ms, {self.errors} errors")
+
+
+# Rewrite the given manifests on a pool and return their results in input order.
+# Threads overlap the file I/O; processes=True also spreads the regex work over
+# the cores for very large trees. patch=True patches the files through mmap.
+def rewrite_manifests(paths, rewriter, workers=None, processes=False, stats=None, patch=False):
+    stats = stats or ScanStats()
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)
+    worker = partial(patch_file if patch else rewrite_file, rewriter)
+    start = time.perf_counter()
+
+    if workers <= 1 or len(paths) <= 1:
+        stats.workers, stats.mode = 1, "serial"
+        results = [worker(path) for path in paths]
+    elif processes:
+        stats.workers, stats.mode = min(workers, os.cpu_count() or 1), "processes"
+        with ProcessPoolExecutor(max_workers=stats.workers) as pool:
+            chunksize = max(1, len(paths) // (stats.workers * 8))
+            results = list(pool.map(worker, paths, chunksize=chunksize))
+    else:
+        stats.workers, stats.mode = workers, "threads"
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(worker, paths))
+
+    for result in results:
+        stats.add(result)
+    stats.seconds["wall"] += time.perf_counter() - start
+    return results
+
+
+# Walk a directory tree and rewrite every manifest found in it
+def scan_tree(root, rewriter, workers=None, processes=False, patch=False):
+    stats = ScanStats()
+    start = time.perf_counter()
+    paths, stats.directories = walk_manifests(root)
+    stats.seconds["walk"] = time.perf_counter() - start
+    results = rewrite_manifests(paths, rewriter, workers, processes, stats, patch)
+    stats.seconds["wall"] += stats.seconds["walk"]
+    return results, stats
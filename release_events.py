@@ -0,0 +1,69 @@
+import json
+import threading
+import time
+
+# Last event of every run, carrying the final changed_repos list
+FINISHED = "finished"
+
+
+# Writes one JSON object per line for every release state change, flushed
+# immediately so other processes can follow the stream while the run is going.
+# An EventStream without a stream drops every event.
+class EventStream:
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.repo_started = {}
+
+    def start(self, repo):
+        with self.lock:
+            self.repo_started[repo] = time.monotonic()
+
+    def emit(self, event, repo=None, **fields):
+        if self.stream is None:
+            return
+        now = time.monotonic()
+        record = {"event": event, "ts": round(time.time(), 3)}
+        if repo is not None:
+            record["repo"] = repo
+        record.update(fields)
+        with self.lock:
+            if repo in self.repo_started:
+                record["elapsed"] = round(now - self.repo_started[repo], 3)
+            record["run_elapsed"] = round(now - self.started, 3)
+            self.stream.write(json.dumps(record) + "\n")
+            self.stream.flush()
+
+    def close(self):
+        if self.stream is not None and hasattr(self.stream, "name") and self.stream.name not in ("<stdout>", "<stderr>"):
+            self.stream.close()
+
+
+# Read events from an NDJSON file as they are appended, until the run finishes
+def follow(path, poll_interval=0.5, timeout=None):
+    deadline = time.monotonic() + timeout if timeout else None
+    position = 0
+    buffer = ""
+    while True:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                f.seek(position)
+                chunk = f.read()
+                position = f.tell()
+        except FileNotFoundError:
+            chunk = ""
+
+        buffer += chunk
+        while "\n" in buffer:
+            line, buffer = buffer.split("\n", 1)
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield record
+            if record.get("event") == FINISHED:
+                return
+
+        if deadline is not None and time.monotonic() > deadline:
+            return
+        time.sleep(poll_interval)
@@ -0,0 +1,62 @@
+import json
+import os
+import threading
+import time
+
+# Default location of the journal, can be moved with --journal
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.expanduser("~"), ".cache", "jenkins-cicd", "release-journal.json")
+
+
+# Persistent record of which phases of a release finished for each repository,
+# keyed by (release tag, repo). A rerun of the same release skips the finished
+# phases and reuses their results instead of calling GitHub again.
+class ReleaseJournal:
+    def __init__(self, tag, base, path=None, fresh=False):
+        self.tag = tag
+        self.base = base
+        self.path = path or DEFAULT_JOURNAL_PATH
+        self.lock = threading.Lock()
+        self.data = self.load()
+
+        release = self.data.get(tag)
+        # A release cut from another base branch is a different release
+        if fresh or not release or release.get("base") != base:
+            if release and not fresh:
+                print(f"Journal for '{tag}' was recorded for base '{release.get('base')}', starting fresh")
+            self.data[tag] = {"base": base, "repos": {}}
+            self.save()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    # Rewritten atomically after every phase so a crash keeps all finished work
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def repos(self):
+        return self.data[self.tag]["repos"]
+
+    # Finished phases of one repo, e.g. {"checked": {...}, "released": {...}}
+    def get(self, repo):
+        with self.lock:
+            return dict(self.repos().get(repo, {}))
+
+    def record(self, repo, phase, result=None):
+        with self.lock:
+            entry = self.repos().setdefault(repo, {})
+            entry[phase] = dict(result or {}, at=round(time.time(), 3))
+            self.save()
+
+    # Repos this release was created for, in the given input order
+    def released_repos(self, repos):
+        with self.lock:
+            entries = self.repos()
+            return [repo for repo in repos if "released" in entries.get(repo, {})]
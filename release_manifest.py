@@ -0,0 +1,88 @@
+import json
+import re
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+TAG_FORMAT = re.compile(r"^v\d+\.\d+\.\d+$")
+
+
+class ReleaseManifestError(Exception):
+    pass
+
+
+# Read a release manifest into {target repo: {"branch": branch, "tags": {service: tag}}}.
+#
+# Accepted shapes, as JSON or YAML:
+#   {"gi-kyc-service": "v1.4.0", "gi-client-static": "v2.0.1"}
+#   {"services": {"gi-kyc-service": "v1.4.0"}}
+#   {"repos": {"argocd-prod": {"gi-kyc-service": "v1.4.0"},
+#              "release-test-1": {"branch": "develop", "services": {...}}}}
+# Services given without a repo belong to default_repo, which is deployed to
+# default_branch unless its entry names a branch. Every other repo must name its
+# branch, so a release train never pushes a repo to another repo's branch.
+def load_release_manifest(path, default_repo, default_branch):
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    if path.endswith((".yaml", ".yml")):
+        if yaml is None:
+            raise ReleaseManifestError("PyYAML is required for YAML release manifests (pip install pyyaml)")
+        try:
+            data = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise ReleaseManifestError(f"{path}: {e}")
+    else:
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            raise ReleaseManifestError(f"{path}: {e}")
+
+    if not isinstance(data, dict):
+        raise ReleaseManifestError(f"{path}: expected a mapping of service to tag")
+
+    if "repos" in data:
+        repos = data["repos"]
+        if not isinstance(repos, dict):
+            raise ReleaseManifestError(f"{path}: 'repos' must map a repository to its services")
+    else:
+        repos = {default_repo: data.get("services", data)}
+
+    releases = {}
+    for repo, entry in repos.items():
+        if not isinstance(entry, dict):
+            raise ReleaseManifestError(f"{path}: services of '{repo}' must map a service to a tag")
+
+        # {"branch": ..., "services": {...}} or a plain mapping of service to tag
+        branch = None
+        services = entry
+        if isinstance(entry.get("services"), dict):
+            branch = entry.get("branch")
+            services = entry["services"]
+            extra = set(entry) - {"branch", "services"}
+            if extra:
+                raise ReleaseManifestError(f"{path}: unknown keys for '{repo}': {', '.join(sorted(extra))}")
+        if branch is not None and (not isinstance(branch, str) or not branch.strip()):
+            raise ReleaseManifestError(f"{path}: branch of '{repo}' must be a branch name")
+        if branch is None:
+            if repo != default_repo:
+                raise ReleaseManifestError(f"{path}: '{repo}' needs a branch, e.g. "
+                                           f'{{"branch": "develop", "services": {{...}}}}')
+            branch = default_branch
+
+        tags = {}
+        for service, tag in services.items():
+            tag = str(tag).strip()
+            if not TAG_FORMAT.match(tag):
+                raise ReleaseManifestError(f"{path}: invalid tag '{tag}' for {service}, use the format vX.Y.Z")
+            tags[str(service).strip()] = tag
+        if tags:
+            releases[repo] = {"branch": branch.strip(), "tags": tags}
+    return releases
+
+
+# Short description of a release train for commit messages, e.g. "gi-a v1.2.0, gi-b v1.3.0"
+def describe(tags):
+    return ", ".join(f"{service} {tag}" for service, tag in sorted(tags.items()))
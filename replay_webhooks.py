@@ -0,0 +1,56 @@
+import argparse
+import json
+import sys
+import urllib.request
+from urllib.error import HTTPError
+
+from webhook_receiver import sign
+
+
+# Post recorded webhook payloads to a local receiver, signed like GitHub would
+def replay(url, secret, path, event="workflow_run", repo=None, tag=None, conclusion=None):
+    with open(path, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+
+    # Optionally retarget the recording at another repo/tag/outcome
+    if repo:
+        payload.setdefault("repository", {})["full_name"] = repo
+    if tag:
+        payload.setdefault("workflow_run", {})["head_branch"] = tag
+    if conclusion:
+        payload.setdefault("workflow_run", {})["conclusion"] = conclusion
+
+    body = json.dumps(payload).encode("utf-8")
+    request = urllib.request.Request(url, data=body, method="POST", headers={
+        "Content-Type": "application/json",
+        "X-GitHub-Event": event,
+        "X-Hub-Signature-256": sign(secret, body),
+    })
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.read().decode("utf-8")
+    except HTTPError as e:
+        return e.code, e.read().decode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded GitHub webhook payloads against a local receiver")
+    parser.add_argument("url", help="Receiver URL, e.g. http://127.0.0.1:8787/")
+    parser.add_argument("secret", help="Webhook secret the receiver was started with")
+    parser.add_argument("payloads", nargs="+", help="Recorded payload JSON files")
+    parser.add_argument("--event", default="workflow_run")
+    parser.add_argument("--repo", help="Override repository.full_name")
+    parser.add_argument("--tag", help="Override workflow_run.head_branch")
+    parser.add_argument("--conclusion", help="Override workflow_run.conclusion")
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.payloads:
+        status, body = replay(args.url, args.secret, path, args.event, args.repo, args.tag, args.conclusion)
+        print(f"{path}: {status} {body}")
+        failed = failed or status >= 400
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+import atexit
+import json
+import os
+import threading
+
+from packaging.version import InvalidVersion, Version
+
+# Default location of the per-repo index cache, can be moved with GITHUB_TAG_INDEX
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".cache", "jenkins-cicd", "tag-index.json")
+
+
+# Sorted semver view of one repository's tags, newest first
+class TagIndex:
+    def __init__(self, tags=None, etag=None):
+        # Each entry is [tag_name, sha, object_type]
+        self.tags = tags or []
+        self.etag = etag
+
+    def latest(self):
+        return self.tags[0][0] if self.tags else None
+
+    def previous(self):
+        return self.tags[1][0] if len(self.tags) > 1 else None
+
+    def sha(self, name):
+        for tag_name, sha, object_type in self.tags:
+            if tag_name == name:
+                return sha, object_type
+        return None, None
+
+    def names(self):
+        return [entry[0] for entry in self.tags]
+
+
+# Parse a tag name as a final release version; pre-releases and non-semver tags return None
+def release_version(name):
+    try:
+        version = Version(name)
+    except InvalidVersion:
+        return None
+    if version.is_prerelease or version.is_devrelease or version.local:
+        return None
+    return version
+
+
+def build_index(refs, etag=None):
+    versions = []
+    for ref in refs:
+        name = ref["ref"][len("refs/tags/"):]
+        version = release_version(name)
+        if version is None:
+            continue
+        target = ref.get("object", {})
+        versions.append((version, [name, target.get("sha"), target.get("type")]))
+    versions.sort(key=lambda item: item[0], reverse=True)
+    return TagIndex([entry for _, entry in versions], etag)
+
+
+# Fetch every page of a list endpoint, following the Link header
+def fetch_all_pages(client, url, name):
+    items = []
+    etags = []
+    while url:
+        response = client.get(url, name=name)
+        if response.status_code != 200:
+            return None, None
+        items.extend(response.json())
+        etags.append(response.headers.get("ETag", ""))
+        url = response.links.get("next", {}).get("url")
+    return items, "|".join(etags)
+
+
+# Persistent per-repo tag indexes. The refs listing is revalidated through
+# the HTTP cache, so an unchanged repo reuses its sorted index as-is.
+class TagIndexCache:
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("GITHUB_TAG_INDEX") or DEFAULT_INDEX_PATH
+        self.lock = threading.Lock()
+        self.indexes = self.load()
+        self.dirty = False
+        atexit.register(self.save)
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return {key: TagIndex(value["tags"], value.get("etag")) for key, value in data.items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            data = json.dumps({key: {"tags": index.tags, "etag": index.etag} for key, index in self.indexes.items()})
+            self.dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Warning: Unable to save tag index {self.path}: {e}")
+
+    # Return the semver index for owner/repo, refreshing it from the matching-refs endpoint.
+    # Returns None when the listing fails: an empty index would read as a repo without tags
+    def get(self, client, owner, repo, prefix="v"):
+        key = f"{owner}/{repo}"
+        refs, etag = fetch_all_pages(
+            client, f"https://api.github.com/repos/{owner}/{repo}/git/matching-refs/tags/{prefix}?per_page=100", "tag_index")
+
+        # Repos whose tags don't use the prefix fall back to every tag
+        if prefix and refs is not None and not refs:
+            return self.get(client, owner, repo, prefix="")
+
+        with self.lock:
+            if refs is None:
+                return None
+            cached = self.indexes.get(key)
+            if cached is not None and etag and cached.etag == etag:
+                return cached
+            index = build_index(refs, etag)
+            self.indexes[key] = index
+            self.dirty = True
+            return index
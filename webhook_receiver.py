@@ -0,0 +1,125 @@
+import hashlib
+import hmac
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Check the X-Hub-Signature-256 header GitHub sends with every delivery
+def verify_signature(secret, body, signature):
+    if not secret or not signature or not signature.startswith("sha256="):
+        return False
+    expected = "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def sign(secret, body):
+    return "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status, message):
+        body = json.dumps({"message": message}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+
+        if not verify_signature(self.server.receiver.secret, body, self.headers.get("X-Hub-Signature-256")):
+            self.reply(401, "invalid signature")
+            return
+
+        event = self.headers.get("X-GitHub-Event")
+        if event == "ping":
+            self.reply(200, "pong")
+            return
+        if event != "workflow_run":
+            self.reply(202, f"ignored event {event}")
+            return
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self.reply(400, "invalid JSON")
+            return
+
+        resolved = self.server.receiver.handle(payload)
+        self.reply(200, "resolved" if resolved else "ignored")
+
+
+# Local HTTP receiver for workflow_run webhook deliveries. Completed runs are
+# kept by (owner/repo, tag) so a waiter is resolved the moment GitHub reports
+# the run, even if the delivery arrived before anyone started waiting.
+class WebhookReceiver:
+    def __init__(self, secret, host="127.0.0.1", port=8787, workflow=None):
+        if not secret:
+            raise ValueError("A webhook secret is required to verify deliveries")
+        self.secret = secret
+        self.workflow = workflow
+        self.lock = threading.Lock()
+        self.runs = {}
+        self.events = {}
+        self.server = ThreadingHTTPServer((host, port), WebhookHandler)
+        self.server.receiver = self
+        self.thread = None
+
+    @property
+    def address(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        print(f"Listening for workflow_run webhooks on {self.address}")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def event_for(self, key):
+        with self.lock:
+            return self.events.setdefault(key, threading.Event())
+
+    # Record a completed workflow_run delivery; returns True if it matched a (repo, tag)
+    def handle(self, payload):
+        run = payload.get("workflow_run") or {}
+        if payload.get("action") != "completed" or run.get("status") != "completed":
+            return False
+        if self.workflow and not (run.get("path") or "").endswith(self.workflow):
+            return False
+
+        repo = (payload.get("repository") or {}).get("full_name")
+        # For runs triggered by a tag push, head_branch holds the tag name
+        tag = run.get("head_branch")
+        if not repo or not tag:
+            return False
+
+        key = (repo.lower(), tag)
+        with self.lock:
+            self.runs[key] = run
+        self.event_for(key).set()
+        print(f"[webhook] {repo}@{tag}: {run.get('conclusion')}")
+        return True
+
+    # Block until the run for (repo, tag) completes or the timeout passes; returns the run or None
+    def wait(self, repo, tag, timeout, cancelled=None):
+        key = (repo.lower(), tag)
+        event = self.event_for(key)
+        remaining = timeout
+        # Wait in short slices so a cancelled watch doesn't sit out the whole interval
+        while remaining > 0 and not (cancelled is not None and cancelled.is_set()):
+            if event.wait(min(remaining, 1.0)):
+                with self.lock:
+                    return self.runs.get(key)
+            remaining -= 1.0
+        return None
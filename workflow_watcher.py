@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fetch_artifact import fetch_success_services, write_services
+from github_client import get_client
+from webhook_receiver import WebhookReceiver
+
+DEFAULT_OWNER = "gripinvest"
+DEFAULT_WORKFLOW = "production-release.yml"
+
+
+# Outcome of watching one repository's workflow run
+class WatchResult:
+    def __init__(self, repo):
+        self.repo = repo
+        self.status = "pending"
+        self.conclusion = None
+        self.url = None
+        self.run_id = None
+        self.polls = 0
+        self.elapsed = None
+
+    def to_dict(self):
+        return {
+            "repo": self.repo, "status": self.status, "conclusion": self.conclusion,
+            "url": self.url, "run_id": self.run_id, "polls": self.polls, "elapsed": self.elapsed,
+        }
+
+
+# Fetch the newest run of the workflow for the given tag, or None if it hasn't started yet.
+# For a tag push the run's head_branch is the tag name, which is what `branch` filters on.
+# The run is checked as well, so a previous release's run is never taken for this one
+def latest_run(client, repo, workflow, tag):
+    url = f"https://api.github.com/repos/{repo}/actions/workflows/{workflow}/runs?branch={tag}&per_page=1"
+    response = client.get(url, name="workflow_runs")
+    if response.status_code != 200:
+        print(f"[{repo}] Error {response.status_code} fetching workflow runs")
+        return None
+    runs = response.json().get("workflow_runs") or []
+    return runs[0] if runs and runs[0].get("head_branch") == tag else None
+
+
+# Poll one repository with adaptive backoff until its run completes, the
+# deadline passes or another repository cancels the watch. With a webhook
+# receiver the wait between polls ends as soon as the completed run is delivered.
+def watch_repo(client, repo, workflow, tag, cancelled, deadline, initial_interval, max_interval,
+               on_success=None, receiver=None):
+    result = WatchResult(repo)
+    started = time.monotonic()
+    interval = initial_interval
+    run = None
+
+    while not cancelled.is_set():
+        if run is None:
+            result.polls += 1
+            try:
+                run = latest_run(client, repo, workflow, tag)
+            except Exception as e:
+                # Network errors that survived the client's retries: keep polling until the deadline
+                print(f"[{repo}] Error fetching workflow runs: {e}")
+                run = None
+        if run is None:
+            print(f"[{repo}] No runs yet for '{workflow}' on '{tag}'")
+        else:
+            result.run_id = run.get("id")
+            result.url = run.get("html_url")
+            if run.get("status") == "completed":
+                result.status = "completed"
+                result.conclusion = run.get("conclusion")
+                result.elapsed = round(time.monotonic() - started, 1)
+                if result.conclusion == "success":
+                    print(f"[{repo}] GitHub Action succeeded after {result.elapsed}s: {result.url}")
+                    if on_success is not None:
+                        on_success(repo, run)
+                else:
+                    print(f"[{repo}] GitHub Action failed (conclusion={result.conclusion}): {result.url}")
+                    cancelled.set()
+                return result
+
+        # The last wait is cut short at the deadline and the run is checked once more there
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            result.status = "timeout"
+            result.elapsed = round(time.monotonic() - started, 1)
+            print(f"[{repo}] Timed out waiting for GitHub Action")
+            cancelled.set()
+            return result
+        wait = min(interval, remaining)
+        if run is not None:
+            print(f"[{repo}] Status='{run.get('status')}', next check in {wait:.0f}s")
+
+        if receiver is not None:
+            run = receiver.wait(repo, tag, wait, cancelled)
+        else:
+            cancelled.wait(wait)
+            run = None
+        interval = min(interval * 1.5, max_interval)
+
+    result.status = "cancelled"
+    result.elapsed = round(time.monotonic() - started, 1)
+    return result
+
+
+# Watch every repository concurrently; the first failed or timed out run cancels the rest
+def watch_runs(client, repos, tag, workflow=DEFAULT_WORKFLOW, timeout=1800, initial_interval=10,
+               max_interval=120, on_success=None, cancelled=None, receiver=None):
+    cancelled = cancelled or threading.Event()
+    deadline = time.monotonic() + timeout
+    if not repos:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=len(repos)) as executor:
+        futures = {
+            repo: executor.submit(watch_repo, client, repo, workflow, tag, cancelled, deadline,
+                                  initial_interval, max_interval, on_success, receiver)
+            for repo in repos
+        }
+        return {repo: future.result() for repo, future in futures.items()}
+
+
+def qualify(repo, owner):
+    return repo if "/" in repo else f"{owner}/{repo}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wait for the release workflow run of every repository")
+    parser.add_argument("tag", help="Release tag the workflow runs were triggered for")
+    parser.add_argument("repos", help="Comma-separated repo or owner/repo list")
+    parser.add_argument("token", help="GitHub token")
+    parser.add_argument("--owner", default=DEFAULT_OWNER, help="Owner for repos given without one")
+    parser.add_argument("--workflow", default=DEFAULT_WORKFLOW)
+    parser.add_argument("--timeout", type=int, default=1800, help="Overall timeout in seconds")
+    parser.add_argument("--initial-interval", type=float, default=10)
+    parser.add_argument("--max-interval", type=float, default=120)
+    parser.add_argument("--artifact-repo",
+                        help="Read the Success-Service artifact of this repo as soon as its run succeeds")
+    parser.add_argument("--artifact-output", help="File the artifact's JSON service list is written to")
+    parser.add_argument("--webhook-port", type=int,
+                        help="Also accept workflow_run webhooks on this port; polling becomes the fallback")
+    parser.add_argument("--webhook-host", default="127.0.0.1")
+    parser.add_argument("--webhook-secret-env", default="GITHUB_WEBHOOK_SECRET",
+                        help="Environment variable holding the webhook secret")
+    args = parser.parse_args()
+
+    repos = [qualify(repo.strip(), args.owner) for repo in args.repos.split(",") if repo.strip()]
+    if not repos:
+        print("No repos to monitor; skipping.")
+        print("[]")
+        return 0
+
+    receiver = None
+    if args.webhook_port:
+        receiver = WebhookReceiver(os.environ.get(args.webhook_secret_env), args.webhook_host,
+                                   args.webhook_port, args.workflow).start()
+
+    client = get_client(args.token)
+
+    # Fetch the artifact in the watcher thread of its repo, while the other repos are still running
+    def on_success(repo, run):
+        if not args.artifact_repo or qualify(args.artifact_repo, args.owner).lower() != repo.lower():
+            return
+        try:
+            services = fetch_success_services(client, args.tag, repo, args.workflow, run=run)
+        except Exception as e:
+            print(f"[{repo}] Error reading artifact: {e}")
+            return
+        if services is not None:
+            print(f"[{repo}] Extracted Services: {services}")
+            if args.artifact_output:
+                write_services(args.artifact_output, services)
+
+    try:
+        results = watch_runs(client, repos, args.tag, args.workflow, args.timeout,
+                             args.initial_interval, args.max_interval, on_success, receiver=receiver)
+    finally:
+        if receiver is not None:
+            receiver.stop()
+
+    print("\n Workflow summary:")
+    for repo, result in results.items():
+        print(f"  {repo}: {result.status} ({result.conclusion}) in {result.elapsed}s after {result.polls} polls")
+    client.print_stats()
+    print(json.dumps([result.to_dict() for result in results.values()]))
+
+    ok = all(result.conclusion == "success" for result in results.values())
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())